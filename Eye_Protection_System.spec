@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets'), ('models', 'models'), ('data', 'data'), ('config.py', '.'), ('camera.py', '.'), ('detector.py', '.'), ('state_manager.py', '.'), ('logger_db.py', '.'), ('gui_user.py', '.'), ('gui_dev.py', '.')],
+    datas=[('assets', 'assets'), ('models', 'models'), ('data', 'data'), ('config.py', '.'), ('camera.py', '.'), ('detector.py', '.'), ('state_manager.py', '.'), ('logger_db.py', '.'), ('gui_user.py', '.'), ('gui_dev.py', '.'), ('frame_source.py', '.'), ('capture_process.py', '.'), ('frame_products.py', '.'), ('multi_camera.py', '.'), ('capture_negotiation.py', '.'), ('session_recorder.py', '.'), ('detector_backends.py', '.'), ('face_tracker.py', '.'), ('presence_filter.py', '.'), ('detection_service.py', '.'), ('frame_quality.py', '.'), ('scheduler.py', '.')],
     hiddenimports=['tkinter', 'PIL', 'PIL._tkinter_finder', 'matplotlib', 'matplotlib.backends.backend_tkagg', 'sqlite3'],
     hookspath=[],
     hooksconfig={},
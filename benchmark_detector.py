@@ -0,0 +1,251 @@
+# benchmark_detector.py
+"""Sweep face detector settings over a labeled frame set and report cost vs accuracy.
+
+Usage:
+    python benchmark_detector.py --session data/recordings/user_20250101_120000.zip
+    python benchmark_detector.py --synthetic 200 --scales 1.0,0.5 --min-neighbors 3,5
+    python benchmark_detector.py --tiling --workers 1,2,4,8
+
+--tiling compares single-pass and tiled detection across resolutions,
+detection scales (--scales) and worker counts instead of sweeping
+parameters. Tiling needs at least two workers.
+
+Labels are per-frame presence. Session archives (session_recorder) only
+contribute frames with a ground truth label - the faces the live detector
+recorded would just measure agreement with it. Label them first:
+    python session_recorder.py data/recordings/user_20250101_120000.zip absent
+    python session_recorder.py data/recordings/user_20250101_120000.zip present 120-480
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+from detector import FaceDetector
+from detector_backends import create_detector_backend
+from frame_source import SyntheticSource
+from session_recorder import read_session
+from config import (DETECTOR_BACKEND, DETECTION_SCALE, DETECTION_SCALE_FACTOR, DETECTION_MIN_NEIGHBORS,
+                    DETECTION_MIN_FACE_SIZE)
+
+def load_session_frames(paths):
+    """(frame, present) pairs of the labeled frames in recorded session archives"""
+    samples = []
+    for path in paths:
+        unlabeled = 0
+        for entry, frame in read_session(path):
+            if frame is None:
+                continue
+            if entry.get('present') is None:
+                unlabeled += 1
+                continue
+            samples.append((frame, bool(entry['present'])))
+        if unlabeled:
+            print(f"{path}: {unlabeled} unlabeled frames skipped - label them with session_recorder.py")
+    return samples
+
+
+def synthetic_frames(count):
+    """(frame, present) pairs from the synthetic source, half with a face"""
+    source = SyntheticSource(realtime=False, face_frames=10, empty_frames=10)
+    source.open()
+    samples = []
+    for index in range(count):
+        ok, frame = source.read()
+        if ok:
+            samples.append((frame.copy(), source.has_face(index)))
+    source.release()
+    return samples
+
+
+def run_config(samples, backend_name, scale, scale_factor, min_neighbors, min_face_size, pipeline=False):
+    """Detect every sample with one configuration; None if the backend isn't available"""
+    try:
+        backend = create_detector_backend(backend_name)
+    except Exception as e:
+        print(f"Error loading {backend_name} detector backend: {e}")
+        return None
+    if hasattr(backend, 'scale_factor'):
+        backend.scale_factor = scale_factor
+        backend.min_neighbors = min_neighbors
+
+    # Without `pipeline` every frame is a plain detection: no ROI, tracking, motion gate or size band.
+    # The quality gate stays off - its "unknown" frames would count as misses against the labels
+    detector = FaceDetector(backend=backend, background_load=False, scale=scale, min_face_size=min_face_size,
+                            roi_tracking=pipeline, tracking=pipeline, motion_gate=pipeline, size_band=pipeline,
+                            quality_gate=False)
+
+    latencies = []
+    true_pos = false_pos = false_neg = 0
+    start = time.perf_counter()
+    for frame, present in samples:
+        detect_start = time.perf_counter()
+        detected = len(detector.detect_faces(frame)) > 0
+        latencies.append(time.perf_counter() - detect_start)
+        true_pos += detected and present
+        false_pos += detected and not present
+        false_neg += present and not detected
+    total = time.perf_counter() - start
+    detector.close()
+
+    precision = true_pos / (true_pos + false_pos) if true_pos + false_pos else 1.0
+    recall = true_pos / (true_pos + false_neg) if true_pos + false_neg else 1.0
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        'backend': backend_name,
+        'scale': scale,
+        'scale_factor': scale_factor,
+        'min_neighbors': min_neighbors,
+        'min_face_size': min_face_size,
+        'mean_ms': float(latencies_ms.mean()),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p90_ms': float(np.percentile(latencies_ms, 90)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+        'fps': len(samples) / total if total > 0 else 0.0,
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+
+
+def pareto_front(results):
+    """Results not beaten on both mean latency and F1 by any other result"""
+    front = []
+    for result in results:
+        dominated = any(
+            other['mean_ms'] <= result['mean_ms'] and other['f1'] >= result['f1']
+            and (other['mean_ms'] < result['mean_ms'] or other['f1'] > result['f1'])
+            for other in results
+        )
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda r: r['mean_ms'])
+
+
+def config_snippet(result):
+    """config.py lines reproducing a benchmarked configuration"""
+    return '\n'.join([
+        f"# {result['mean_ms']:.1f} ms mean / {result['p90_ms']:.1f} ms p90, "
+        f"precision {result['precision']:.3f}, recall {result['recall']:.3f}",
+        f"DETECTOR_BACKEND = '{result['backend']}'",
+        f"DETECTION_SCALE = {result['scale']}",
+        f"DETECTION_SCALE_FACTOR = {result['scale_factor']}",
+        f"DETECTION_MIN_NEIGHBORS = {result['min_neighbors']}",
+        f"DETECTION_MIN_FACE_SIZE = {result['min_face_size']}",
+    ])
+
+
+def benchmark_tiling(resolutions, worker_counts, grids, scales=(DETECTION_SCALE,), frames=10):
+    """Mean full-frame detection latency, single pass vs tiled, per resolution / scale / workers / grid"""
+    results = []
+    # FaceDetector only tiles with a pool - a one-worker "tiled" run would be a single pass
+    tile_workers = [n for n in worker_counts if n > 1]
+    for (width, height), scale in itertools.product(resolutions, scales):
+        source = SyntheticSource(width=width, height=height, realtime=False, noise=0)
+        source.open()
+        samples = [source.read()[1].copy() for _ in range(frames)]
+        source.release()
+
+        baseline = None
+        for grid in [None] + (grids if tile_workers else []):
+            for workers in ([1] if grid is None else tile_workers):
+                detector = FaceDetector(background_load=False, scale=scale, tile_grid=grid, tile_min_pixels=0,
+                                        workers=workers, roi_tracking=False, tracking=False, motion_gate=False,
+                                        size_band=False, quality_gate=False)
+                detector.detect_faces(samples[0])  # creates the worker backends
+                start = time.perf_counter()
+                found = sum(len(detector.detect_faces(frame)) > 0 for frame in samples)
+                mean_ms = (time.perf_counter() - start) * 1000.0 / len(samples)
+                detector.close()
+
+                if grid is None:
+                    baseline = mean_ms
+                result = {'width': width, 'height': height, 'scale': scale, 'grid': grid, 'workers': workers,
+                          'mean_ms': mean_ms, 'speedup': baseline / mean_ms if mean_ms else 0.0,
+                          'frames_with_face': found, 'frames': len(samples)}
+                results.append(result)
+                label = 'single' if grid is None else f"{grid[0]}x{grid[1]} tiles"
+                print(f"{width}x{height:<5} scale={scale:<5} {label:10} workers={workers:<2} {mean_ms:8.1f} ms  "
+                      f"x{result['speedup']:.2f}  faces found {found}/{len(samples)}")
+    return results
+
+
+def _list(value, cast):
+    return [cast(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detector parameter sweep")
+    parser.add_argument('--session', action='append', default=[], help="recorded session archive (repeatable)")
+    parser.add_argument('--synthetic', type=int, default=0, help="number of synthetic frames to add")
+    parser.add_argument('--backends', default=DETECTOR_BACKEND)
+    parser.add_argument('--scales', default=f"1.0,{DETECTION_SCALE}", help="detection scales (also for --tiling)")
+    parser.add_argument('--scale-factors', default=f"{DETECTION_SCALE_FACTOR},1.2,1.3")
+    parser.add_argument('--min-neighbors', default=f"3,{DETECTION_MIN_NEIGHBORS}")
+    parser.add_argument('--min-sizes', default=f"{DETECTION_MIN_FACE_SIZE}")
+    parser.add_argument('--pipeline', action='store_true', help="keep ROI search, tracking, motion gating and the face-size band on")
+    parser.add_argument('--output', help="write all results as JSON")
+    parser.add_argument('--tiling', action='store_true', help="benchmark tiled detection instead")
+    parser.add_argument('--resolutions', default="640x480,1280x720,1920x1080,3840x2160")
+    parser.add_argument('--workers', default=','.join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)))
+    parser.add_argument('--grids', default="2x2,3x3")
+    args = parser.parse_args()
+
+    if args.tiling:
+        print(f"CPU cores: {os.cpu_count()}")
+        results = benchmark_tiling([tuple(_list(r.replace('x', ','), int)) for r in args.resolutions.split(',')],
+                                   _list(args.workers, int),
+                                   [tuple(_list(g.replace('x', ','), int)) for g in args.grids.split(',')],
+                                   _list(args.scales, float))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
+        return
+
+    samples = load_session_frames(args.session)
+    if args.session and not samples:
+        parser.error("the session archives have no labeled frames - label them with session_recorder.py")
+    if args.synthetic or not samples:
+        samples += synthetic_frames(args.synthetic or 200)
+    positives = sum(present for _, present in samples)
+    print(f"Frames: {len(samples)} ({positives} with a face)")
+
+    grid = itertools.product(_list(args.backends, str), _list(args.scales, float),
+                             _list(args.scale_factors, float), _list(args.min_neighbors, int),
+                             _list(args.min_sizes, int))
+    results = []
+    skipped = set()
+    for backend_name, scale, scale_factor, min_neighbors, min_face_size in grid:
+        if backend_name in skipped:
+            continue
+        result = run_config(samples, backend_name, scale, scale_factor, min_neighbors, min_face_size, args.pipeline)
+        if result is None:
+            print(f"Backend {backend_name} not available - skipped")
+            skipped.add(backend_name)
+            continue
+        results.append(result)
+        print(f"{backend_name:5} scale={scale:<5} sf={scale_factor:<5} nb={min_neighbors:<2} min={min_face_size:<4} "
+              f"mean {result['mean_ms']:6.1f} ms  p50 {result['p50_ms']:6.1f}  p90 {result['p90_ms']:6.1f}  "
+              f"p99 {result['p99_ms']:6.1f}  {result['fps']:6.1f} fps  "
+              f"P {result['precision']:.3f}  R {result['recall']:.3f}  F1 {result['f1']:.3f}")
+
+    if not results:
+        print("No configuration could be run")
+        return
+
+    print("\nPareto-optimal settings (mean latency vs F1):\n")
+    for result in pareto_front(results):
+        print(config_snippet(result))
+        print()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,18 @@ def build_executable():
         '--add-data=logger_db.py;.',
         '--add-data=gui_user.py;.',
         '--add-data=gui_dev.py;.',
+        '--add-data=frame_source.py;.',
+        '--add-data=capture_process.py;.',
+        '--add-data=frame_products.py;.',
+        '--add-data=multi_camera.py;.',
+        '--add-data=capture_negotiation.py;.',
+        '--add-data=session_recorder.py;.',
+        '--add-data=detector_backends.py;.',
+        '--add-data=face_tracker.py;.',
+        '--add-data=presence_filter.py;.',
+        '--add-data=detection_service.py;.',
+        '--add-data=frame_quality.py;.',
+        '--add-data=scheduler.py;.',
         
         # Hidden imports (dependencies yang tidak terdeteksi otomatis)
         '--hidden-import=tkinter',
@@ -1,94 +1,535 @@
 # camera.py
-import cv2
+import numpy as np
 import threading
 import time
+from config import (CAMERA_WIDTH, CAMERA_HEIGHT, FRAME_BUFFER_SLOTS, CAMERA_IDLE_MODE, CAMERA_IDLE_FPS,
+                    CAPTURE_MODE, CAMERA_STALL_TIMEOUT, CAMERA_RECONNECT_MIN_DELAY,
+                    CAMERA_RECONNECT_MAX_DELAY, CAMERA_WATCHDOG_INTERVAL)
+from frame_source import create_frame_source
+from frame_products import FrameProductCache
+
+# Camera power states
+POWER_ACTIVE = 'active'        # full rate capture
+POWER_THROTTLED = 'throttled'  # device kept open, frames read at CAMERA_IDLE_FPS
+POWER_SUSPENDED = 'suspended'  # device released, capture thread parked
+
+# Capture modes
+CAPTURE_THREAD = 'thread'    # capture thread in this process
+CAPTURE_PROCESS = 'process'  # child process writing into a shared memory ring
+
+# Camera health states reported by get_health()
+HEALTH_OK = 'ok'
+HEALTH_STALLED = 'stalled'            # no frames for CAMERA_STALL_TIMEOUT, reconnect requested
+HEALTH_RECONNECTING = 'reconnecting'  # device released, reopening with backoff
+HEALTH_IDLE = 'idle'                  # throttled or suspended on purpose
+HEALTH_STOPPED = 'stopped'
 
 class CameraManager:
-    def __init__(self):
+    def __init__(self, buffer_slots=FRAME_BUFFER_SLOTS, source=None, capture_mode=CAPTURE_MODE):
+        # Frame source - the live device by default, see frame_source.py
+        self.source = source if source is not None else create_frame_source()
+        self.capture_mode = capture_mode
         self.camera = None
         self.is_running = False
         self.current_frame = None
         self.capture_thread = None
         self.on_frame_callback = None
         self.frame_lock = threading.Lock()
+        self.frame_condition = threading.Condition(self.frame_lock)
         
-    def start_camera(self):
-        """Start camera capture"""
-        try:
+        # Power state - changed from any thread, applied by the capture thread
+        self.power_state = POWER_ACTIVE
+        self.power_changed = threading.Event()
+        self.device_lock = threading.Lock()
+        
+        # Frame ring buffer - preallocated and filled in place by camera.read()
+        self.buffer_slots = max(2, buffer_slots)
+        self.frame_buffers = []
+        self.slot_sequences = []
+        self.slot_timestamps = []  # capture time.time() per slot
+        self.slot_write_counts = None  # CAPTURE_PROCESS: the child's shared per-slot write counters
+        self.slot_write_ids = []  # write counter value of each published slot
+        self.latest_slot = None
+        self.frame_sequence = 0
+        self._allocate_buffers((CAMERA_HEIGHT, CAMERA_WIDTH, 3))
+        
+        # Derived images (gray, downscaled, preview) shared by all consumers of a frame
+        self.frame_products = FrameProductCache(max_entries=self.buffer_slots)
+        
+        # Health watchdog - tracks frame age and reconnects stalled devices
+        self.watchdog_thread = None
+        self.health_state = HEALTH_STOPPED
+        self.reconnect_requested = False
+        self.reconnect_count = 0
+        self.reconnect_delay = CAMERA_RECONNECT_MIN_DELAY  # next backoff; reset once frames flow again
+        self.read_failures = 0
+        self.last_frame_time = None       # time.monotonic() of the latest frame
+        self.last_frame_wall_time = None  # time.time() of the latest frame
+        self.measured_fps = 0.0
+    
+    def _allocate_buffers(self, shape, dtype=np.uint8):
+        """Allocate the frame ring for the given frame shape"""
+        with self.frame_lock:
+            self.frame_buffers = [np.empty(shape, dtype=dtype) for _ in range(self.buffer_slots)]
+            self.slot_sequences = [0] * self.buffer_slots
+            self.slot_timestamps = [None] * self.buffer_slots
+            self.slot_write_counts = None
+            self.slot_write_ids = [None] * self.buffer_slots
+            self.latest_slot = None
+            self.current_frame = None
+    
+    def _open_device(self):
+        """Open the frame source (device indices 0 then 1 for a live camera)"""
+        with self.device_lock:
             # Release existing camera if any
             if self.camera:
                 self.camera.release()
-                
-            self.camera = cv2.VideoCapture(0)
+                self.camera = None
             
-            if not self.camera.isOpened():
-                # Try camera index 1 if 0 fails
-                self.camera = cv2.VideoCapture(1)
-                if not self.camera.isOpened():
-                    raise Exception("Cannot open any camera")
-                    
-            # Set camera properties
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera.set(cv2.CAP_PROP_FPS, 30)
+            if not self.source.open():
+                raise Exception(f"Cannot open frame source {self.source.name}")
+            
+            self.camera = self.source
+    
+    def _release_device(self):
+        """Release the capture device, keeping the capture thread alive"""
+        # The last frame is stale once the device is gone
+        with self.frame_lock:
+            self.current_frame = None
+        
+        if self.capture_mode == CAPTURE_PROCESS and self.camera:
+            # Drop our views into the shared ring before the child's mapping is freed
+            self._allocate_buffers(self.frame_buffers[0].shape)
+        
+        with self.device_lock:
+            if self.camera:
+                self.camera.release()
+                self.camera = None
+    
+    def _start_capture_process(self):
+        """Start capture in a child process and map its shared frame ring"""
+        from capture_process import CaptureProcess
+        
+        with self.device_lock:
+            if self.camera:
+                self.camera.release()
+                self.camera = None
             
+            shape = self.frame_buffers[0].shape
+            process = CaptureProcess(self.source, shape, self.buffer_slots)
+            if not process.start():
+                raise Exception(f"Cannot start capture process for {self.source.name}")
+            
+            # Consumers get views straight into shared memory - no per-frame copy
+            with self.frame_lock:
+                self.frame_buffers = process.frame_buffers
+                self.slot_sequences = [0] * self.buffer_slots
+                self.slot_timestamps = [None] * self.buffer_slots
+                self.slot_write_counts = process.write_counts
+                self.slot_write_ids = [None] * self.buffer_slots
+                self.latest_slot = None
+                self.current_frame = None
+            # The device is opened in the child - keep the parent's source copy describing it
+            self.source.capture_mode = process.capture_mode
+            self.camera = process
+    
+    def start_camera(self):
+        """Start camera capture"""
+        try:
+            # First start: probing capture modes takes seconds, so the device is opened by the
+            # capture thread (or the capture process) instead of the caller, usually the UI thread
+            negotiating = self.source.needs_negotiation()
+            if self.capture_mode == CAPTURE_PROCESS:
+                self._start_capture_process()
+                capture_loop = self._relay_loop
+            elif negotiating:
+                print("Negotiating the capture mode on the capture thread")
+                capture_loop = self._capture_loop
+            else:
+                self._open_device()
+                capture_loop = self._capture_loop
+            
+            self.power_state = POWER_ACTIVE
+            # No frames while probing - not a stall
+            self.health_state = HEALTH_RECONNECTING if negotiating else HEALTH_OK
+            self.reconnect_requested = False
+            self.last_frame_time = time.monotonic()
             self.is_running = True
-            self.capture_thread = threading.Thread(target=self._capture_loop)
+            self.capture_thread = threading.Thread(target=capture_loop)
             self.capture_thread.daemon = True
             self.capture_thread.start()
             
+            self.watchdog_thread = threading.Thread(target=self._watchdog_loop)
+            self.watchdog_thread.daemon = True
+            self.watchdog_thread.start()
+            
             print("Camera started successfully")
             return True
-            
+        
         except Exception as e:
             print(f"Error starting camera: {e}")
             return False
-            
+    
     def _capture_loop(self):
         """Main capture loop"""
         while self.is_running:
             try:
-                ret, frame = self.camera.read()
+                if self.power_state == POWER_SUSPENDED:
+                    if self.camera:
+                        self._release_device()
+                        print("Camera suspended")
+                    # Park until resumed or stopped
+                    self.power_changed.wait(timeout=1.0)
+                    self.power_changed.clear()
+                    continue
+                
+                if self.reconnect_requested:
+                    # Watchdog saw the device stall - drop it and reopen with backoff
+                    self.reconnect_requested = False
+                    self.power_changed.clear()  # set by request_reconnect(), must not cut the backoff short
+                    self._release_device()
+                    self._reconnect(count=True)
+                    continue
+                
+                if self.camera is None:
+                    # Resuming from suspend - reopen the device on this thread, not the caller's
+                    self._reconnect()
+                    continue
+                
+                # Fill the slot after the latest one in place; the latest slot
+                # is never written while it is the one handed to consumers
+                slot = 0 if self.latest_slot is None else (self.latest_slot + 1) % self.buffer_slots
+                buffer = self.frame_buffers[slot]
+                with self.frame_lock:
+                    # The slot's previous frame stops being valid before any of it is overwritten
+                    self.slot_sequences[slot] = 0
+                ret, frame = self.camera.read(buffer)
                 
                 if ret and frame is not None:
-                    with self.frame_lock:
-                        self.current_frame = frame
+                    if frame is not buffer:
+                        # Driver delivered a different size - resize the ring to match
+                        print(f"Frame shape changed to {frame.shape}, reallocating frame buffers")
+                        self._allocate_buffers(frame.shape, frame.dtype)
+                        slot = 0
+                        np.copyto(self.frame_buffers[slot], frame)
+                    
+                    view = self._publish_slot(slot)
+                    self.read_failures = 0
                     
                     if self.on_frame_callback:
-                        self.on_frame_callback(frame)
+                        self.on_frame_callback(view)
+                elif self.camera.finished:
+                    # File or image sequence replay reached its end
+                    print(f"Frame source {self.source.name} finished")
+                    self._stop_running()
                 else:
-                    print("Failed to read frame from camera")
-                    
+                    # Report once per failure streak; the watchdog reconnects if it persists
+                    if self.read_failures == 0:
+                        print("Failed to read frame from camera")
+                    self.read_failures += 1
+                    time.sleep(0.033)  # Avoid spinning on a failing device
+                
+                if self.power_state == POWER_THROTTLED:
+                    # Idle rate; a power change wakes the loop immediately
+                    if self.power_changed.wait(timeout=1.0 / CAMERA_IDLE_FPS):
+                        self.power_changed.clear()
+            
             except Exception as e:
                 print(f"Error in capture loop: {e}")
+                time.sleep(0.033)
+        
+        self._release_device()
+    
+    def _reconnect(self, count=False):
+        """Reopen the device with exponential backoff (capture thread only).
+        
+        The backoff only resets once a frame is published, so a device that
+        opens but delivers nothing is reopened (count=True, after a stall) at
+        growing intervals. Gives up early when the camera is stopped or
+        suspended meanwhile.
+        """
+        self.health_state = HEALTH_RECONNECTING
+        self.read_failures = 0
+        
+        # After a stall, back off before the first attempt too
+        if count and self._backoff():
+            return False
+        
+        while self.is_running and self.power_state != POWER_SUSPENDED:
+            try:
+                self._open_device()
+            except Exception as e:
+                print(f"Camera reconnect failed: {e} - retrying in {self.reconnect_delay:.1f}s")
+            else:
+                if count:
+                    self.reconnect_count += 1
+                    print(f"Camera reconnected (reconnect #{self.reconnect_count})")
+                else:
+                    print("Camera resumed")
+                self.last_frame_time = time.monotonic()  # restart the stall clock
+                self.health_state = HEALTH_OK
+                return True
+            
+            self._backoff()
+        
+        return False
+    
+    def _backoff(self):
+        """Sleep out the reconnect delay and double it; True if stopped or suspended meanwhile"""
+        # Wakes early on stop or a power change
+        if self.power_changed.wait(timeout=self.reconnect_delay):
+            self.power_changed.clear()
+        self.reconnect_delay = min(self.reconnect_delay * 2, CAMERA_RECONNECT_MAX_DELAY)
+        return not self.is_running or self.power_state == POWER_SUSPENDED
+    
+    def _watchdog_loop(self):
+        """Track frame age and fps; request a reconnect when frames stop arriving"""
+        last_check = time.monotonic()
+        last_sequence = self.frame_sequence
+        
+        while self.is_running:
+            time.sleep(CAMERA_WATCHDOG_INTERVAL)
+            now = time.monotonic()
+            
+            # Measured fps over the last watchdog interval
+            sequence = self.frame_sequence
+            self.measured_fps = (sequence - last_sequence) / max(now - last_check, 1e-6)
+            last_check, last_sequence = now, sequence
+            
+            if self.power_state != POWER_ACTIVE or self.health_state != HEALTH_OK:
+                continue
+            
+            frame_age = now - self.last_frame_time
+            if frame_age > CAMERA_STALL_TIMEOUT:
+                print(f"Camera stalled ({frame_age:.1f}s without frames) - reconnecting")
+                self.health_state = HEALTH_STALLED
+                self.request_reconnect()
+    
+    def request_reconnect(self):
+        """Ask the capture side to drop and reopen the device; never blocks"""
+        self.reconnect_requested = True
+        if self.capture_mode == CAPTURE_PROCESS and self.camera:
+            self.camera.send('reconnect')
+        self.power_changed.set()
+    
+    def get_health(self):
+        """Get camera health: state, frame age, fps and reconnect counters"""
+        if not self.is_running:
+            state = HEALTH_STOPPED
+        elif self.power_state != POWER_ACTIVE:
+            state = HEALTH_IDLE
+        else:
+            state = self.health_state
+        
+        frame_age = None
+        if self.last_frame_wall_time is not None and self.current_frame is not None:
+            frame_age = time.time() - self.last_frame_wall_time
+        
+        return {
+            'state': state,
+            'last_frame_time': self.last_frame_wall_time,
+            'frame_age': frame_age,
+            'fps': self.measured_fps,
+            'reconnect_count': self.reconnect_count,
+            'read_failures': self.read_failures,
+            'power_state': self.power_state
+        }
+    
+    def _relay_loop(self):
+        """Publish frames written by the capture process (CAPTURE_PROCESS mode)"""
+        process = self.camera
+        while self.is_running:
+            try:
+                message = process.poll(timeout=0.5)
+                if message is None:
+                    if not process.is_alive():
+                        print("Capture process exited")
+                        self._stop_running()
+                    continue
                 
-            time.sleep(0.033)  # ~30 FPS
+                # Drain the backlog so a slow consumer only ever sees the newest frame
+                latest_slot = None
+                while message is not None:
+                    kind = message[0]
+                    if kind == 'frame':
+                        latest_slot, capture_time, write_id = message[1], message[2], message[3]
+                    elif kind == 'suspended':
+                        latest_slot = None
+                        with self.frame_lock:
+                            self.current_frame = None
+                        print("Camera suspended")
+                    elif kind == 'resumed':
+                        self.source.capture_mode = message[1]
+                        print("Camera resumed")
+                        self.last_frame_time = time.monotonic()
+                        self.health_state = HEALTH_OK
+                    elif kind == 'reconnected':
+                        self.source.capture_mode = message[1]
+                        self.reconnect_requested = False
+                        self.reconnect_count += 1
+                        print(f"Camera reconnected (reconnect #{self.reconnect_count})")
+                        self.last_frame_time = time.monotonic()
+                        self.health_state = HEALTH_OK
+                    elif kind == 'finished':
+                        print(f"Frame source {self.source.name} finished")
+                        self._stop_running()
+                    elif kind == 'error':
+                        print(f"Error in capture process: {message[1]}")
+                        self.health_state = HEALTH_RECONNECTING
+                    message = process.poll(0)
+                
+                if latest_slot is not None:
+                    view = self._publish_slot(latest_slot, capture_time, write_id)
+                    # Keep the child from overwriting the frame consumers are handed now
+                    process.send('published', latest_slot)
+                                        
+                    if self.on_frame_callback:
+                        self.on_frame_callback(view)
             
+            except Exception as e:
+                print(f"Error in relay loop: {e}")
+                time.sleep(0.033)
+    
+    def _stop_running(self):
+        """Mark capture as stopped and wake anyone waiting for frames"""
+        self.is_running = False
+        with self.frame_condition:
+            self.frame_condition.notify_all()
+    
+    def _publish_slot(self, slot, capture_time=None, write_id=None):
+        """Make a filled slot the latest frame and return its read-only view"""
+        view = self.frame_buffers[slot].view()
+        view.flags.writeable = False
+        
+        with self.frame_lock:
+            self.frame_sequence += 1
+            self.slot_sequences[slot] = self.frame_sequence
+            self.slot_timestamps[slot] = capture_time if capture_time is not None else time.time()
+            self.slot_write_ids[slot] = write_id
+            self.latest_slot = slot
+            self.current_frame = view
+            self.last_frame_time = time.monotonic()
+            self.last_frame_wall_time = self.slot_timestamps[slot]
+            self.reconnect_delay = CAMERA_RECONNECT_MIN_DELAY  # the device delivers again
+            self.frame_condition.notify_all()
+        
+        return view
+    
+    def set_power_state(self, state):
+        """Request a power state change; applied asynchronously by the capture thread"""
+        if state not in (POWER_ACTIVE, POWER_THROTTLED, POWER_SUSPENDED):
+            raise ValueError(f"Unknown camera power state: {state}")
+        
+        if state != self.power_state:
+            if state == POWER_ACTIVE:
+                # Don't count the idle period as a stall
+                self.last_frame_time = time.monotonic()
+            self.power_state = state
+            self.power_changed.set()
+            if self.capture_mode == CAPTURE_PROCESS and self.camera:
+                self.camera.send('power', state)
+            print(f"Camera power state: {state}")
+    
+    def idle(self):
+        """Enter the configured idle state (CAMERA_IDLE_MODE) while monitoring is off"""
+        self.set_power_state(CAMERA_IDLE_MODE)
+    
+    def resume(self):
+        """Return to full rate capture without blocking the caller.
+        
+        Returns False if the capture thread is not running, in which case the
+        caller has to fall back to start_camera()/restart_camera().
+        """
+        if not self.is_running or not self.capture_thread or not self.capture_thread.is_alive():
+            return False
+        
+        self.set_power_state(POWER_ACTIVE)
+        return True
+    
     def get_frame(self):
         """Get current frame with thread safety"""
         with self.frame_lock:
             return self.current_frame if self.current_frame is not None else None
-            
+    
+    def get_frame_with_sequence(self):
+        """Get current frame together with its sequence number"""
+        with self.frame_lock:
+            if self.current_frame is None:
+                return None, 0
+            return self.current_frame, self.frame_sequence
+    
+    def get_frame_sequence(self):
+        """Get sequence number of the latest frame (0 if none yet)"""
+        with self.frame_lock:
+            return self.frame_sequence if self.current_frame is not None else 0
+    
+    def wait_for_frame(self, after_sequence=0, timeout=None):
+        """Block until a frame newer than `after_sequence` exists.
+        
+        Returns (frame, sequence), or (None, after_sequence) on timeout or
+        when the camera stops.
+        """
+        with self.frame_condition:
+            self.frame_condition.wait_for(
+                lambda: not self.is_running or
+                        (self.current_frame is not None and self.frame_sequence > after_sequence),
+                timeout
+            )
+            if self.current_frame is None or self.frame_sequence <= after_sequence:
+                return None, after_sequence
+            return self.current_frame, self.frame_sequence
+    
+    def get_capture_mode(self):
+        """Capture mode the source delivers (backend, fourcc, size, fps, measured cost) or None"""
+        return self.source.capture_mode
+    
+    def get_frame_products(self, frame, sequence):
+        """Get the shared FrameProducts of frame `sequence` (computed lazily, once per frame)"""
+        return self.frame_products.get(frame, sequence)
+    
+    def get_frame_timestamp(self, sequence):
+        """Capture time (time.time()) of frame `sequence`, or None once its slot is overwritten"""
+        with self.frame_lock:
+            for slot, slot_sequence in enumerate(self.slot_sequences):
+                if slot_sequence == sequence and self._slot_intact(slot):
+                    return self.slot_timestamps[slot]
+        return None
+    
+    def is_frame_valid(self, sequence):
+        """Check whether the slot holding frame `sequence` has not been overwritten yet"""
+        with self.frame_lock:
+            if sequence <= 0 or sequence not in self.slot_sequences:
+                return False
+            return self._slot_intact(self.slot_sequences.index(sequence))
+    
+    def _slot_intact(self, slot):
+        """False once the capture process has started overwriting a published slot (call with frame_lock)"""
+        if self.slot_write_counts is None or self.slot_write_ids[slot] is None:
+            return True
+        return int(self.slot_write_counts[slot]) == self.slot_write_ids[slot]
+    
     def stop_camera(self):
         """Stop camera capture"""
-        self.is_running = False
+        self.power_changed.set()
+        self._stop_running()
         
         if self.capture_thread and self.capture_thread.is_alive():
             self.capture_thread.join(timeout=2.0)
-            
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-            
-        print("Camera stopped")
         
+        if self.watchdog_thread and self.watchdog_thread.is_alive():
+            self.watchdog_thread.join(timeout=2.0)
+        
+        self._release_device()
+        
+        print("Camera stopped")
+    
     def is_camera_available(self):
         """Check if camera is available and working"""
         if not self.camera:
             return False
-            
+        
         return self.camera.isOpened() and self.current_frame is not None
-
+    
     def restart_camera(self):
         """Restart camera - useful when switching modes"""
         self.stop_camera()
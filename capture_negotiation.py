@@ -0,0 +1,168 @@
+# capture_negotiation.py
+import cv2
+import json
+import os
+import time
+from config import CAMERA_FORMAT_CACHE, CAMERA_FOURCCS, CAMERA_PROBE_FRAMES
+
+def fourcc_to_str(value):
+    """Decode a CAP_PROP_FOURCC value to its four character code"""
+    value = int(value)
+    if value <= 0:
+        return ''
+    return ''.join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00')
+
+
+def available_backends():
+    """Camera backends this OpenCV build supports, as (name, api id) pairs"""
+    try:
+        backends = cv2.videoio_registry.getCameraBackends()
+        return [(cv2.videoio_registry.getBackendName(api), api) for api in backends]
+    except Exception:
+        return [('ANY', cv2.CAP_ANY)]
+
+
+def describe_capture(capture, backend_name=None):
+    """What the driver actually delivers for an open VideoCapture"""
+    return {
+        'backend': backend_name or capture.getBackendName(),
+        'fourcc': fourcc_to_str(capture.get(cv2.CAP_PROP_FOURCC)),
+        'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': capture.get(cv2.CAP_PROP_FPS),
+    }
+
+
+def open_capture(index, backend, fourcc, width, height, fps):
+    """Open device `index` with a backend and pixel format, or return None"""
+    capture = cv2.VideoCapture(index, backend)
+    if not capture.isOpened():
+        capture.release()
+        return None
+    
+    # FOURCC has to be set before the resolution for most V4L2/DirectShow drivers
+    if fourcc:
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    capture.set(cv2.CAP_PROP_FPS, fps)
+    return capture
+
+
+def probe_mode(index, backend_name, backend, fourcc, width, height, fps, frames=CAMERA_PROBE_FRAMES):
+    """Open one backend/format combination and measure achieved fps and decode cost"""
+    capture = open_capture(index, backend, fourcc, width, height, fps)
+    if capture is None:
+        return None
+    
+    try:
+        mode = describe_capture(capture, backend_name)
+        mode['backend_api'] = backend
+        mode['requested_fourcc'] = fourcc
+        
+        # Let auto exposure and the driver queue settle before measuring
+        for _ in range(5):
+            if not capture.read()[0]:
+                return None
+        
+        # CPU time of this process per frame is the decode + copy cost we pay
+        delivered = 0
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        for _ in range(frames):
+            ret, frame = capture.read()
+            if ret:
+                delivered += 1
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        
+        if delivered == 0:
+            return None
+        
+        mode['measured_fps'] = delivered / wall if wall > 0 else 0.0
+        mode['cpu_ms_per_frame'] = 1000.0 * cpu / delivered
+        return mode
+    finally:
+        capture.release()
+
+
+def choose_mode(modes, width, height, fps):
+    """Cheapest mode that delivers the configured resolution and close to the configured fps"""
+    usable = [m for m in modes if m['width'] >= width and m['height'] >= height]
+    fast_enough = [m for m in usable if m['measured_fps'] >= 0.9 * fps]
+    candidates = fast_enough or usable or modes
+    if not candidates:
+        return None
+    
+    if fast_enough:
+        return min(candidates, key=lambda m: m['cpu_ms_per_frame'])
+    # Nothing reaches the target fps - take the fastest
+    return max(candidates, key=lambda m: m['measured_fps'])
+
+
+def negotiate_capture_mode(index, width, height, fps, fourccs=CAMERA_FOURCCS, use_cache=True):
+    """Probe backends x pixel formats for device `index` and pick the cheapest that works.
+    
+    The chosen mode (with all probe results under 'probed') is cached in
+    CAMERA_FORMAT_CACHE so later starts skip probing. A negotiation that
+    found no usable mode is cached too (negotiated False) and returns None,
+    so the default mode is used without probing again.
+    """
+    cache_key = _cache_key(index, width, height, fps)
+    if use_cache:
+        cache = _load_cache()
+        if cache_key in cache:
+            cached = cache[cache_key]
+            return cached if cached.get('negotiated') else None
+    
+    modes = []
+    for backend_name, backend in available_backends():
+        for fourcc in fourccs:
+            try:
+                mode = probe_mode(index, backend_name, backend, fourcc, width, height, fps)
+            except Exception as e:
+                print(f"Capture probe {backend_name}/{fourcc} failed: {e}")
+                mode = None
+            if mode:
+                print(f"Capture probe {backend_name}/{mode['fourcc'] or fourcc}: {mode['width']}x{mode['height']} "
+                      f"{mode['measured_fps']:.1f} fps, {mode['cpu_ms_per_frame']:.2f} ms CPU/frame")
+                modes.append(mode)
+    
+    chosen = choose_mode(modes, width, height, fps)
+    if chosen is None:
+        print("No capture mode could be negotiated - using the default backend and format")
+        entry = {'negotiated': False, 'probed': modes}
+    else:
+        entry = chosen = dict(chosen, probed=modes, negotiated=True)
+    
+    if use_cache:
+        cache = _load_cache()
+        cache[cache_key] = entry
+        _save_cache(cache)
+    return chosen
+
+
+def is_mode_cached(index, width, height, fps):
+    """Whether device `index` was already negotiated (successfully or not) for this resolution and fps"""
+    return _cache_key(index, width, height, fps) in _load_cache()
+
+
+def _cache_key(index, width, height, fps):
+    return f"{index}:{width}x{height}@{fps}"
+
+
+def _load_cache():
+    try:
+        with open(CAMERA_FORMAT_CACHE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(CAMERA_FORMAT_CACHE), exist_ok=True)
+        with open(CAMERA_FORMAT_CACHE, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"Could not save capture mode cache: {e}")
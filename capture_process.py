@@ -0,0 +1,231 @@
+# capture_process.py
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+import time
+from config import CAMERA_IDLE_FPS, CAMERA_RECONNECT_MIN_DELAY, CAMERA_RECONNECT_MAX_DELAY
+from camera import POWER_SUSPENDED, POWER_THROTTLED
+
+class CaptureProcess:
+    """Runs a frame source in a child process, writing frames into a shared memory ring.
+    
+    The parent maps the same ring as NumPy arrays, so frames are never copied
+    between processes; only slot numbers travel over the pipe. Stands in for
+    the device in CameraManager (isOpened()/release()).
+    
+    After the frames the ring holds one write counter per slot. The child
+    bumps a slot's counter before it starts overwriting the slot and sends
+    the new value with the frame, so the parent can tell whether a frame it
+    published is still intact. The parent reports the slot it publishes
+    ('published' command) and the child doesn't write into that one.
+    
+    Only the child's copy of the source opens the device, so the child
+    sends the source's capture_mode along with 'opened', 'resumed' and
+    'reconnected'.
+    """
+    
+    def __init__(self, source, shape, slots):
+        self.source = source
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.shm = None
+        self.process = None
+        self.conn = None
+        self.frame_buffers = []
+        self.write_counts = None  # per-slot write counters in shared memory
+        self.capture_mode = None  # the child's source.capture_mode, once it opened
+        self.opened = False
+        self.finished = False
+    
+    def start(self, timeout=5.0):
+        """Create the shared ring, start the child and wait until the source is open"""
+        frame_bytes = int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes * self.slots + 8 * self.slots)
+        self.frame_buffers, self.write_counts = _map_ring(self.shm, self.shape, self.slots)
+        self.write_counts[:] = 0
+        
+        self.conn, child_conn = mp.Pipe()
+        self.process = mp.Process(
+            target=_capture_main,
+            args=(self.source, self.shm.name, self.shape, self.slots, child_conn),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        
+        message = self.poll(timeout)
+        if not message or message[0] != 'opened' or not message[1]:
+            self.release()
+            return False
+        
+        self.capture_mode = message[2]
+        self.opened = True
+        return True
+    
+    def poll(self, timeout=None):
+        """Receive the next message from the child, or None on timeout"""
+        try:
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+        except (EOFError, OSError):
+            self.opened = False
+        return None
+    
+    def send(self, *command):
+        """Send a command tuple to the child"""
+        try:
+            self.conn.send(command)
+        except (BrokenPipeError, OSError) as e:
+            print(f"Capture process unreachable: {e}")
+    
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+    
+    def isOpened(self):
+        return self.opened and self.is_alive()
+    
+    def release(self):
+        """Stop the child and free the shared ring"""
+        if self.process is not None:
+            if self.process.is_alive():
+                self.send('stop')
+                self.process.join(timeout=2.0)
+                if self.process.is_alive():
+                    self.process.terminate()
+                    self.process.join(timeout=1.0)
+            self.process = None
+        
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        
+        # Drop our views before closing the mapping
+        self.frame_buffers = []
+        self.write_counts = None
+        if self.shm is not None:
+            try:
+                self.shm.close()
+            except BufferError:
+                # A consumer still holds a frame view; the mapping goes away with it
+                pass
+            self.shm.unlink()
+            self.shm = None
+        self.opened = False
+
+
+def _map_ring(shm, shape, slots):
+    """Frame buffers and the per-slot write counters of a shared ring"""
+    frame_bytes = int(np.prod(shape))
+    buffers = [
+        np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=i * frame_bytes)
+        for i in range(slots)
+    ]
+    write_counts = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=slots * frame_bytes)
+    return buffers, write_counts
+
+
+def _capture_main(source, shm_name, shape, slots, conn):
+    """Child process entry point - attach to the shared ring and capture into it"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffers, write_counts = _map_ring(shm, shape, slots)
+    
+    try:
+        _capture_into(source, buffers, write_counts, conn)
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        print(f"Error in capture process: {e}")
+    finally:
+        source.release()
+        del buffers, write_counts
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        conn.close()
+
+
+def _capture_into(source, buffers, write_counts, conn):
+    """Capture loop of the child process"""
+    power_state = None
+    slot = 0
+    published = None  # slot the parent currently hands to consumers
+    reconnecting = False
+    delay = CAMERA_RECONNECT_MIN_DELAY  # next backoff; reset once a frame is read again
+    retry_at = 0.0  # time.monotonic() before which the source isn't reopened
+    
+    if source.needs_negotiation():
+        # Probing capture modes takes seconds - don't keep the parent waiting, open in the loop below
+        conn.send(('opened', True, None))
+    else:
+        opened = source.open()
+        conn.send(('opened', opened, source.capture_mode))
+        if not opened:
+            return
+    
+    while True:
+        # Apply pending commands without blocking capture
+        while conn.poll():
+            command = conn.recv()
+            if command[0] == 'stop':
+                return
+            if command[0] == 'power':
+                power_state = command[1]
+            if command[0] == 'published':
+                published = command[1]
+            if command[0] == 'reconnect' and source.isOpened():
+                # Parent watchdog saw frames stop - drop the device and reopen it below after
+                # the backoff, which keeps growing while reopened devices stay silent
+                source.release()
+                reconnecting = True
+                retry_at = time.monotonic() + delay
+                delay = min(delay * 2, CAMERA_RECONNECT_MAX_DELAY)
+        
+        if power_state == POWER_SUSPENDED:
+            if source.isOpened():
+                source.release()
+                conn.send(('suspended',))
+            # Park until the next command arrives
+            conn.poll(1.0)
+            continue
+        
+        if not source.isOpened():
+            wait = retry_at - time.monotonic()
+            if wait > 0:
+                # Back off, waking early for commands
+                conn.poll(wait)
+                continue
+            if not source.open():
+                conn.send(('error', f"Cannot open frame source {source.name} - retrying in {delay:.1f}s"))
+                retry_at = time.monotonic() + delay
+                delay = min(delay * 2, CAMERA_RECONNECT_MAX_DELAY)
+                continue
+            conn.send(('reconnected' if reconnecting else 'resumed', source.capture_mode))
+            reconnecting = False
+        
+        if slot == published:
+            slot = (slot + 1) % len(buffers)
+        buffer = buffers[slot]
+        # Invalidate the slot's previous frame before any of it is overwritten
+        write_counts[slot] += 1
+        ret, frame = source.read(buffer)
+        
+        if ret and frame is not None:
+            if frame is not buffer:
+                # The shared ring has a fixed size - fit the frame into it
+                if frame.shape != buffer.shape:
+                    cv2.resize(frame, (buffer.shape[1], buffer.shape[0]), dst=buffer, interpolation=cv2.INTER_AREA)
+                else:
+                    np.copyto(buffer, frame)
+            conn.send(('frame', slot, time.time(), int(write_counts[slot])))
+            slot = (slot + 1) % len(buffers)
+            delay = CAMERA_RECONNECT_MIN_DELAY  # the source delivers again
+        elif source.finished:
+            conn.send(('finished',))
+            return
+        else:
+            time.sleep(0.033)
+        
+        if power_state == POWER_THROTTLED:
+            conn.poll(1.0 / CAMERA_IDLE_FPS)
@@ -13,7 +13,37 @@ DB_PATH = os.path.join(DATA_DIR, 'eye_protection.db')
 # Application settings
 SCREEN_TIME_LIMIT = 20  # seconds
 BREAK_TIME_REQUIRED = 7  # seconds
-DETECTION_INTERVAL = 1  # seconds
+DETECTION_INTERVAL = 0.5  # seconds between face detections
+
+# Camera settings
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
+FRAME_BUFFER_SLOTS = 4  # preallocated frames in the capture ring
+FRAME_SOURCE = 'device'  # 'device', 'video', 'images' or 'synthetic'
+FRAME_SOURCE_PATH = ''  # video file or image directory for 'video' / 'images'
+FRAME_SOURCE_REALTIME = True  # False replays files / synthetic frames as fast as possible
+CAPTURE_MODE = 'thread'  # 'process' captures in a child process into a shared memory ring
+CAMERA_WATCHDOG_INTERVAL = 0.5  # seconds between camera health checks
+CAMERA_STALL_TIMEOUT = 2.0  # seconds without frames before reconnecting
+CAMERA_RECONNECT_MIN_DELAY = 0.5  # reconnect backoff, doubled after each failed attempt
+CAMERA_RECONNECT_MAX_DELAY = 30.0
+CAMERA_DEVICE_INDICES = []  # e.g. [0, 1] to run two cameras at once; empty = single camera
+CAMERA_DETECTION_WEIGHTS = None  # share of detections per camera, e.g. [2, 1]; None = equal
+PRESENCE_FUSION = 'any'  # multi-camera presence: 'any', 'majority' or 'all'
+CAMERA_NEGOTIATE_FORMAT = True  # probe backends/pixel formats once and use the cheapest that works
+CAMERA_FOURCCS = ['MJPG', 'YUYV']  # pixel formats to probe
+CAMERA_PROBE_FRAMES = 30  # frames measured per probed mode
+CAMERA_FORMAT_CACHE = os.path.join(DATA_DIR, 'capture_mode.json')
+CAMERA_IDLE_MODE = 'suspended'  # 'suspended' releases the device, 'throttled' keeps it open
+CAMERA_IDLE_FPS = 2  # capture rate while throttled
+
+# Session recorder (frames + detection results for offline regression runs)
+RECORDING_ENABLED = False
+RECORDINGS_DIR = os.path.join(DATA_DIR, 'recordings')
+RECORDER_FRAME_STRIDE = 1  # record every Nth detected frame
+RECORDER_QUEUE_SIZE = 16  # frames waiting for encoding; more are dropped
+RECORDER_JPEG_QUALITY = 90
 
 # Developer password
 DEV_PASSWORD = "Kakikudaada4"
@@ -22,6 +52,77 @@ DEV_PASSWORD = "Kakikudaada4"
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 LOGO_PATH = os.path.join(ASSETS_DIR, 'pens_logo.png')
+PREVIEW_WIDTH = 400  # developer mode camera preview
+PREVIEW_HEIGHT = 300
+PREVIEW_DETECTION_INTERVAL = 0.1  # seconds between detections while the preview shows boxes
 
 # Cascade classifier path
-CASCADE_PATH = os.path.join(MODELS_DIR, 'haarcascade_frontalface_default.xml')
\ No newline at end of file
+CASCADE_PATH = os.path.join(MODELS_DIR, 'haarcascade_frontalface_default.xml')
+# Face detection tuning
+DETECTION_ROI_TRACKING = True  # search only around the last detected face between full scans
+DETECTION_ROI_MARGIN = 0.5  # ROI grows by this fraction of the face size on each side
+DETECTION_FULL_SCAN_INTERVAL = 10  # force a full-frame scan every N detections
+DETECTION_SCALE = 0.5  # detect on a downscaled gray image (0.5 = quarter of the pixels)
+DETECTION_MIN_FACE_SIZE = 50  # smallest face searched for, in frame pixels
+DETECTION_MAX_FACE_SIZE = None  # largest face searched for, in frame pixels; None = no limit
+DETECTION_SCALE_FACTOR = 1.1  # cascade pyramid step
+DETECTION_MIN_NEIGHBORS = 5  # cascade hits needed to accept a face
+DETECTION_MOTION_GATE = True  # reuse the last result while the scene is static
+DETECTION_MOTION_PIXEL_THRESHOLD = 12  # gray level change that counts a thumbnail pixel as changed
+DETECTION_MOTION_MIN_CHANGED = 0.02  # fraction of changed pixels that counts as motion
+DETECTION_MAX_STALENESS = 3.0  # seconds a cached result may be reused before detection is forced
+DETECTION_WORKERS = min(4, os.cpu_count() or 1)  # threads for detect_faces_batch
+
+# Face detector backend: 'haar' (default), 'lbp' (faster, less accurate) or 'dnn' (most accurate, most CPU)
+DETECTOR_BACKEND = 'haar'
+DETECTOR_BACKGROUND_LOAD = True  # load and warm up the detector off the UI thread
+LBP_CASCADE_PATH = os.path.join(MODELS_DIR, 'lbpcascade_frontalface_improved.xml')
+DNN_MODEL_PATH = os.path.join(MODELS_DIR, 'res10_300x300_ssd_iter_140000.caffemodel')
+DNN_CONFIG_PATH = os.path.join(MODELS_DIR, 'deploy.prototxt')
+DNN_CONFIDENCE = 0.6
+DNN_INPUT_SIZE = 300
+
+# Eye-presence stage: eye cascade in the upper half of face boxes; looking away counts as a micro-break
+EYE_DETECTION = False
+EYE_CASCADE_PATH = os.path.join(MODELS_DIR, 'haarcascade_eye.xml')  # falls back to OpenCV's built-in copy
+EYE_MIN_NEIGHBORS = 3  # eye cascade hits needed to accept an eye
+EYE_DETECTION_INTERVAL = 3  # check the eyes on every Nth detection
+EYE_DETECTION_BUDGET = 0.002  # average seconds per detection the eye stage may add; slower runs are spaced out
+EYE_FACE_WIDTH = 120  # face regions wider than this are downscaled before the eye search
+EYE_OFF_COUNT = 2  # eye checks in a row without eyes before the user counts as looking away
+
+# Face tracking between detections (template matching)
+FACE_TRACKING = True
+TRACKER_MIN_CONFIDENCE = 0.6  # match score below which a full re-detection runs
+TRACKER_SEARCH_MARGIN = 0.5  # search window grows by this fraction of the face size on each side
+TRACKER_MAX_MISSES = 2  # detections a face may be missed before its track (and id) is dropped
+TRACKER_TEMPLATE_SIZE = 32  # faces are matched at this width in pixels
+
+# Presence filter between face detection and the state manager
+PRESENCE_FILTER_MODE = 'hysteresis'  # 'hysteresis', 'vote' or 'none'
+PRESENCE_ON_COUNT = 2  # detections with a face needed to become present
+PRESENCE_OFF_COUNT = 3  # detections without a face needed to become absent
+PRESENCE_WINDOW = 5  # sliding window length for 'vote'
+PRESENCE_UNKNOWN_TIMEOUT = 4.0  # seconds of "unknown" results until absent; keep below BREAK_TIME_REQUIRED
+
+# Face-size band: restrict the cascade's scale range to recently observed face sizes
+FACE_SIZE_BAND = True
+FACE_SIZE_HISTORY = 20  # detected faces remembered per camera
+FACE_SIZE_MIN_SAMPLES = 5  # faces needed before the band is used
+FACE_SIZE_MARGIN = 0.25  # band = observed sizes widened by this fraction
+FACE_SIZE_RECHECK_INTERVAL = 10  # every Nth full scan searches all sizes again
+
+# Tiled detection for high-resolution cameras: split big detection images into overlapping tiles
+DETECTION_TILE_GRID = (2, 2)  # columns, rows; None disables tiling
+DETECTION_TILE_MIN_PIXELS = 1280 * 720  # only tile scans of at least this many frame pixels (before DETECTION_SCALE)
+
+# Frame quality gate: skip the cascade on frames that can't show a face
+FRAME_QUALITY_GATE = True
+FRAME_QUALITY_THUMBNAIL_SIZE = (160, 120)  # checks run on a thumbnail this size
+FRAME_DARK_MEAN = 35  # mean gray level below which a frame is too dark
+FRAME_OVEREXPOSED_LEVEL = 250  # gray level that counts a pixel as saturated
+FRAME_OVEREXPOSED_FRACTION = 0.5  # fraction of saturated pixels that makes a frame overexposed
+FRAME_BLUR_THRESHOLD = 10.0  # thumbnail Laplacian variance below which a frame is blurred (cascade still runs)
+FRAME_BLUR_MIN_CONTRAST = 4.0  # coarse structure a blurred frame keeps; flatter frames are just featureless
+FRAME_SKIN_CHECK = False  # also report frames without skin-colored pixels as "no face"
+FRAME_SKIN_MIN_FRACTION = 0.01  # fraction of skin-colored pixels needed to run the cascade
@@ -0,0 +1,147 @@
+# detection_service.py
+import threading
+import time
+from config import DETECTION_INTERVAL
+from frame_quality import UNUSABLE_REASONS
+
+class DetectionService:
+    """Runs face detection once per new frame and publishes the results.
+
+    The service thread takes frames from the camera manager's detection
+    schedule (every frame sequence is detected at most once) and hands each
+    result to the subscribers, e.g. the state manager and the session
+    recorder. Polling consumers such as the Tk preview read the latest
+    result per camera with get_result() instead of detecting themselves.
+
+    A result is a dict: camera, sequence, frame (a ring buffer view - only
+    valid inside the subscriber call), faces (frame coordinates), age
+    (seconds since the cascade actually ran, see detect_faces_with_age),
+    quality (None, or why the quality gate rejected the frame), eyes
+    (whether eyes were seen in the faces, None when not checked - see
+    FaceDetector.detect_eyes), detected (this camera), present (fused over
+    all cameras), timestamp (capture time) and duration (seconds spent
+    detecting). detected and present are
+    None when the frames were too dark, overexposed or blurred to tell.
+    """
+
+    def __init__(self, camera_manager, face_detector, interval=DETECTION_INTERVAL, should_run=None):
+        self.camera_manager = camera_manager
+        self.face_detector = face_detector
+        self.default_interval = interval
+        self.interval = interval
+        self.should_run = should_run or (lambda: True)  # e.g. only while monitoring
+        self.subscribers = []
+        self.results = {}  # camera index -> latest result
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.detection_count = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+        print("🔍 Detection service started")
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+    def subscribe(self, callback):
+        """Call `callback(result)` for every detection, on the service thread"""
+        with self.lock:
+            if callback not in self.subscribers:
+                self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def get_result(self, camera_index=0):
+        """Latest result for a camera, or None if it hasn't been detected yet"""
+        with self.lock:
+            return self.results.get(camera_index)
+
+    def set_interval(self, interval):
+        """Change the detection period, e.g. faster while a live preview is shown"""
+        self.interval = interval
+
+    def reset_interval(self):
+        self.interval = self.default_interval
+
+    def _run(self):
+        """Detection loop: next scheduled frame -> detect -> publish"""
+        while self.running:
+            try:
+                if not self.should_run():
+                    # Nothing consumes results right now, sleep longer to save resources
+                    time.sleep(0.5)
+                    continue
+
+                # Wake as soon as the next scheduled camera has a frame newer than the last processed one
+                index, frame, sequence = self.camera_manager.wait_for_detection_frame(timeout=1.0)
+                if frame is None:
+                    print(" No frame available for face detection")
+                    time.sleep(0.1)  # scheduled camera is down - don't spin
+                    continue
+
+                detection_start = time.monotonic()
+                self._publish(self._detect(index, frame, sequence))
+
+                # Limit detection rate; the next wait returns immediately with the newest frame
+                remaining = self.interval - (time.monotonic() - detection_start)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+            except Exception as e:
+                print(f"Face detection error: {e}")
+                time.sleep(self.interval)
+
+    def _detect(self, index, frame, sequence):
+        start = time.perf_counter()
+        # Before detecting - a slow detection can outlast the frame's ring slot
+        timestamp = self.camera_manager.get_camera_timestamp(index, sequence)
+        products = self.camera_manager.get_camera_products(index, frame, sequence)
+        faces, age, quality = self.face_detector.detect_faces_with_quality(frame, products, stream=index)
+        detected = None if quality in UNUSABLE_REASONS else len(faces) > 0
+        # Eye check on the same shared gray image, every few detections
+        eyes = self.face_detector.detect_eyes(products.gray, faces, stream=index) if detected else None
+
+        return {
+            'camera': index,
+            'sequence': sequence,
+            'frame': frame,
+            'faces': faces,
+            'age': age,
+            'quality': quality,
+            'eyes': eyes,
+            'detected': detected,
+            'present': self.camera_manager.report_detection(index, detected),
+            'timestamp': timestamp,
+            'duration': time.perf_counter() - start,
+        }
+
+    def _publish(self, result):
+        with self.lock:
+            self.results[result['camera']] = result
+            subscribers = list(self.subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Error in detection subscriber: {e}")
+
+        # Debug log occasionally
+        self.detection_count += 1
+        if self.detection_count % 30 == 0:  # Log every 30 detections
+            status = {True: "terdeteksi", False: "tidak terdeteksi"}.get(result['present'], "tidak diketahui")
+            stats = self.face_detector.get_stats()
+            print(f"🔍 Face detection: {status} ({len(result['faces'])} faces, "
+                  f"static reused {stats['motion_hits']}/{stats['motion_hits'] + stats['motion_misses']})")
@@ -1,58 +1,567 @@
 # detector.py
 import cv2
+import math
 import numpy as np
-from config import CASCADE_PATH
-import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from detector_backends import create_detector_backend, EyeBackend
+from face_tracker import FaceTracker
+from frame_quality import FrameQualityGate, QUALITY_NOT_READY, CASCADE_CHECKED_REASONS
+from config import (DETECTOR_BACKEND, DETECTION_ROI_TRACKING, DETECTION_ROI_MARGIN, DETECTION_FULL_SCAN_INTERVAL,
+                    DETECTION_SCALE, DETECTION_MIN_FACE_SIZE, DETECTION_MAX_FACE_SIZE,
+                    DETECTION_MOTION_GATE, DETECTION_MOTION_PIXEL_THRESHOLD, DETECTION_MOTION_MIN_CHANGED,
+                    DETECTION_MAX_STALENESS, DETECTION_WORKERS, FACE_TRACKING, DETECTOR_BACKGROUND_LOAD,
+                    CAMERA_WIDTH, CAMERA_HEIGHT, FACE_SIZE_BAND, FACE_SIZE_HISTORY, FACE_SIZE_MIN_SAMPLES,
+                    FACE_SIZE_MARGIN, FACE_SIZE_RECHECK_INTERVAL, DETECTION_TILE_GRID, DETECTION_TILE_MIN_PIXELS,
+                    FRAME_QUALITY_GATE, EYE_DETECTION, EYE_DETECTION_INTERVAL, EYE_DETECTION_BUDGET,
+                    EYE_FACE_WIDTH)
+
+# Size of the thumbnail compared by the motion gate
+MOTION_THUMBNAIL_SIZE = (64, 48)
 
 class FaceDetector:
-    def __init__(self):
-        self.face_cascade = None
-        self._load_cascade()
+    def __init__(self, roi_tracking=DETECTION_ROI_TRACKING, roi_margin=DETECTION_ROI_MARGIN,
+                 full_scan_interval=DETECTION_FULL_SCAN_INTERVAL, scale=DETECTION_SCALE,
+                 min_face_size=DETECTION_MIN_FACE_SIZE, max_face_size=DETECTION_MAX_FACE_SIZE,
+                 motion_gate=DETECTION_MOTION_GATE, max_staleness=DETECTION_MAX_STALENESS,
+                 backend=DETECTOR_BACKEND, tracking=FACE_TRACKING, background_load=DETECTOR_BACKGROUND_LOAD,
+                 size_band=FACE_SIZE_BAND, tile_grid=DETECTION_TILE_GRID,
+                 tile_min_pixels=DETECTION_TILE_MIN_PIXELS, workers=DETECTION_WORKERS,
+                 quality_gate=FRAME_QUALITY_GATE, eye_detection=EYE_DETECTION):
+        # Detection backend (Haar / LBP cascade or DNN), all with detect(image, min_size, max_size).
+        # Set once loaded and warmed up; `ready` resolves at that point
+        self.backend = None
+        self.ready = Future()
+        
+        # Optional eye-presence stage (detect_eyes), loaded along with the backend
+        self.eye_detection = eye_detection
+        self.eye_backend = None
+
+        # Detection resolution; face size limits are in frame pixels and scaled along
+        self.scale = scale
+        self.min_face_size = min_face_size
+        self.max_face_size = max_face_size
+        self.resize_buffers = threading.local()  # per-thread reusable downscale target
+        
+        # ROI tracking: per stream (camera / preview) the last faces and detections since a full scan
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin
+        self.full_scan_interval = max(1, full_scan_interval)
+        self.track_states = {}
+        self.track_lock = threading.Lock()
+        
+        # Template tracking keeps faces (with stable ids) between detections
+        self.tracking = tracking
+        
+        # Face-size band: scan only the scales of recently seen faces, all scales now and then
+        self.size_band = size_band
+        
+        # Quality gate: dark, overexposed or blurred frames skip the cascade and come back as "unknown"
+        self.quality_gate = FrameQualityGate() if quality_gate else None
+        
+        # Motion gate: skip the cascade while the scene is unchanged since the last detection
+        self.motion_gate = motion_gate
+        self.max_staleness = max_staleness
+        self.stats = {'full_scans': 0, 'roi_scans': 0, 'roi_misses': 0,
+                      'motion_hits': 0, 'motion_misses': 0, 'tracked': 0, 'track_lost': 0,
+                      'not_ready': 0, 'band_scans': 0, 'band_misses': 0,
+                      'cascade_scans': 0, 'pyramid_levels': 0, 'tiled_scans': 0, 'blur_overruled': 0,
+                      'eye_checks': 0, 'eyes_found': 0, 'eye_time': 0.0}
+        
+        # Tiled scans of large images run on the worker pool
+        self.tile_grid = tile_grid
+        self.tile_min_pixels = tile_min_pixels
+        self.workers = workers
         
-    def _load_cascade(self):
-        """Load Haar cascade classifier"""
+        # Batch/tile detection pool, created on first use; each worker thread loads its own backend
+        self.batch_pool = None
+        self.batch_workers = 0
+        self.batch_pool_lock = threading.Lock()
+        self.worker_state = threading.local()
+        
+        if background_load:
+            # Parsing the cascade and the slow first detection would otherwise block startup
+            loader = threading.Thread(target=self._load_backend, args=(backend, False))
+            loader.daemon = True
+            loader.start()
+        else:
+            self._load_backend(backend)
+    
+    def _load_backend(self, backend, raise_errors=True):
+        """Load the detector backend by name (see detector_backends.DETECTOR_BACKENDS) and warm it up"""
         try:
-            # First try to load from models directory
-            if os.path.exists(CASCADE_PATH):
-                self.face_cascade = cv2.CascadeClassifier(CASCADE_PATH)
-                print(f"Loaded cascade from: {CASCADE_PATH}")
-            else:
-                # Fallback to OpenCV's built-in cascade
-                cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-                self.face_cascade = cv2.CascadeClassifier(cascade_path)
-                print(f"Loaded cascade from: {cascade_path}")
-                
-            if self.face_cascade.empty():
-                raise Exception("Failed to load cascade classifier")
-                
-            print("Cascade classifier loaded successfully")
-        except Exception as e:
-            print(f"Error loading cascade classifier: {e}")
-            raise
+            start = time.perf_counter()
+            loaded = create_detector_backend(backend) if isinstance(backend, str) else backend
+            load_time = time.perf_counter() - start
             
-    def detect_faces(self, frame):
-        """Detect faces in the given frame"""
-        if self.face_cascade is None or frame is None:
-            return []
+            self._warm_up(loaded)
+            if self.eye_detection:
+                try:
+                    self.eye_backend = EyeBackend()
+                except Exception as e:
+                    print(f"Error loading eye cascade: {e} - eye detection disabled")
+            # Publish only now - the warm-up must not race a real detection on the same classifier
+            self.backend = loaded
+            self.ready.set_result(True)
+            print(f"Face detector loaded successfully ({load_time * 1000:.0f} ms load, "
+                  f"{(time.perf_counter() - start - load_time) * 1000:.0f} ms warm-up)")
+        except Exception as e:
+            print(f"Error loading face detector: {e}")
+            self.ready.set_exception(e)
+            if raise_errors:
+                raise
+    
+    def _warm_up(self, backend):
+        """One detection on a dummy frame, so the first real one isn't the slow one"""
+        shape = (CAMERA_HEIGHT, CAMERA_WIDTH, 3) if backend.color else (CAMERA_HEIGHT, CAMERA_WIDTH)
+        dummy = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+        image, scale = self._detection_image(dummy)
+        window = backend.window_size
+        min_side = max(window[0], window[1], int(round(self.min_face_size * scale)))
+        backend.detect(image, (min_side, min_side), (0, 0))
+    
+    def is_ready(self):
+        return self.backend is not None
+    
+    def wait_until_ready(self, timeout=None):
+        """Block until the detector is loaded; False on timeout or load failure"""
+        try:
+            return self.ready.result(timeout)
+        except Exception:
+            return False
             
+    def detect_faces(self, frame, products=None, stream=0):
+        """Detect faces in the given frame
+        
+        Pass the frame's FrameProducts to reuse a gray image other consumers
+        already computed. `stream` identifies the frame sequence (camera)
+        whose last faces bound the ROI search; boxes are always returned in
+        frame coordinates.
+        """
+        return self.detect_faces_with_age(frame, products, stream)[0]
+    
+    def detect_faces_with_age(self, frame, products=None, stream=0):
+        """Like detect_faces, but returns (faces, age).
+        
+        While the scene is static the last result of `stream` is returned
+        without running the cascade; age is the seconds since that result
+        was detected (0.0 for a fresh detection).
+        """
+        return self.detect_faces_with_quality(frame, products, stream)[:2]
+    
+    def detect_faces_with_quality(self, frame, products=None, stream=0):
+        """Like detect_faces_with_age, but returns (faces, age, quality).
+        
+        quality is None when the frame was usable, else the quality gate's
+        reason (see frame_quality), or QUALITY_NOT_READY while the detector
+        isn't loaded. For frame_quality.UNUSABLE_REASONS faces is empty
+        meaning "unknown", not "no face". A blurred frame is only reported
+        as such when the cascade, which still runs on it, finds no face.
+        """
+        if frame is None:
+            return [], 0.0, None
+        if self.backend is None:
+            # Still loading in the background (or failed to load) - no answer, not "no face"
+            self.stats['not_ready'] += 1
+            return [], 0.0, QUALITY_NOT_READY
+        
         try:
-            # Convert to grayscale for detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # Convert to grayscale for detection (shared per frame when products are given)
+            if products is not None:
+                gray = products.gray
+            else:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            
+            quality = None
+            if self.quality_gate is not None:
+                quality = self.quality_gate.check(gray, frame)
+                if quality is not None and quality not in CASCADE_CHECKED_REASONS:
+                    return [], 0.0, quality
+            
+            image, scale = self._detection_image(frame if self.backend.color else gray, products)
+            
+            with self.track_lock:
+                state = self.track_states.setdefault(stream, {'faces': None, 'since_full_scan': 0,
+                                                              'result': None, 'result_time': 0.0,
+                                                              'thumbnail': None, 'tracker': FaceTracker(),
+                                                              'scale': 1.0,
+                                                              'sizes': deque(maxlen=FACE_SIZE_HISTORY),
+                                                              'full_scans': 0, 'eye_countdown': 0})
             
-            # Detect faces with optimized parameters
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(50, 50),  # Increased minimum size for better accuracy
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
+            thumbnail = None
+            if self.motion_gate:
+                thumbnail = cv2.resize(gray, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+                cached = self._cached_result(state, thumbnail)
+                if cached is not None:
+                    self.stats['motion_hits'] += 1
+                    return cached + (self._checked_quality(quality, cached[0]),)
+                self.stats['motion_misses'] += 1
             
-            return faces
+            faces = self._detect(image, scale, state)
             
+            with self.track_lock:
+                state['result'] = faces
+                state['result_time'] = time.monotonic()
+                state['thumbnail'] = thumbnail
+            
+            return faces, 0.0, self._checked_quality(quality, faces)
+        
         except Exception as e:
             print(f"Error in face detection: {e}")
+            return [], 0.0, None
+    
+    def _checked_quality(self, quality, faces):
+        """Quality of a frame the cascade ran on - a face seen through the blur makes it usable"""
+        if quality in CASCADE_CHECKED_REASONS and len(faces) > 0:
+            self.stats['blur_overruled'] += 1
+            return None
+        return quality
+    
+    def detect_eyes(self, gray, faces, stream=0):
+        """Whether eyes are visible in any of `faces`; None when the eye stage didn't run.
+        
+        `gray` is the gray frame the faces were detected on (e.g. the shared
+        FrameProducts.gray) and `faces` are frame coordinates. The eye cascade
+        searches only the upper half of each face, on every
+        EYE_DETECTION_INTERVAL-th call per stream - or more rarely when a run
+        costs more, so the stage adds at most EYE_DETECTION_BUDGET seconds per
+        detection on average.
+        """
+        if self.eye_backend is None or gray is None or len(faces) == 0:
+            return None
+        with self.track_lock:
+            state = self.track_states.get(stream)
+        if state is None:
+            return None
+        
+        state['eye_countdown'] -= 1
+        if state['eye_countdown'] > 0:
+            return None
+        
+        start = time.perf_counter()
+        try:
+            found = any(self._eyes_in_face(gray, face) for face in faces)
+        except Exception as e:
+            print(f"Error in eye detection: {e}")
+            found = None
+        elapsed = time.perf_counter() - start
+        
+        # Space the runs out so their cost, spread over the detections in between, stays within budget
+        state['eye_countdown'] = max(EYE_DETECTION_INTERVAL, math.ceil(elapsed / EYE_DETECTION_BUDGET))
+        self.stats['eye_checks'] += 1
+        self.stats['eyes_found'] += bool(found)
+        self.stats['eye_time'] += elapsed
+        return found
+    
+    def _eyes_in_face(self, gray, face):
+        """Eye cascade on the upper half of one face box"""
+        x, y, w, h = (int(v) for v in face)
+        region = gray[max(0, y):y + h // 2, max(0, x):x + w]
+        if region.size == 0:
+            return False
+        
+        if region.shape[1] > EYE_FACE_WIDTH:
+            factor = EYE_FACE_WIDTH / region.shape[1]
+            size = (EYE_FACE_WIDTH, max(1, int(round(region.shape[0] * factor))))
+            region = cv2.resize(region, size, interpolation=cv2.INTER_AREA)
+            w = int(round(w * factor))
+        
+        # An eye is roughly a fifth of the face width
+        window = self.eye_backend.window_size
+        min_side = max(window[0], window[1], w // 6)
+        max_side = max(min_side, w // 2)
+        eyes = self.eye_backend.detect(region, (min_side, min_side), (max_side, max_side))
+        return len(eyes) > 0
+    
+    def _cached_result(self, state, thumbnail):
+        """(faces, age) of the last detection if the scene hasn't changed since, else None"""
+        with self.track_lock:
+            reference = state['thumbnail']
+            result = state['result']
+            age = time.monotonic() - state['result_time']
+        
+        if reference is None or result is None or reference.shape != thumbnail.shape:
+            return None
+        if age > self.max_staleness:
+            return None
+        
+        # Compare against the thumbnail of the last *detection*, so slow drift still adds up
+        changed = cv2.absdiff(thumbnail, reference) > DETECTION_MOTION_PIXEL_THRESHOLD
+        if np.count_nonzero(changed) > DETECTION_MOTION_MIN_CHANGED * changed.size:
+            return None
+        return result, age
+    
+    def _detect(self, image, scale, state):
+        """Track, or run ROI or full-frame detection on the detection image, returning frame-space boxes"""
+        min_size, max_size = self._face_size_limits(scale)
+        
+        with self.track_lock:
+            last_faces = state['faces']
+            since_full_scan = state['since_full_scan']
+            roi_allowed = (self.roi_tracking and last_faces is not None
+                           and since_full_scan < self.full_scan_interval)
+        
+        tracker = state['tracker']
+        tracking_image = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if self.tracking and tracker.tracks and since_full_scan < self.full_scan_interval:
+            # Cheap step: follow the known faces; detection only when a match gets unsure
+            faces = tracker.track(tracking_image)
+            if faces is not None:
+                self.stats['tracked'] += 1
+                if scale != 1.0:
+                    faces = np.array(scale_boxes(faces, 1.0 / scale), dtype=np.int32)
+                with self.track_lock:
+                    state['faces'] = faces
+                    state['since_full_scan'] += 1
+                return faces
+            self.stats['track_lost'] += 1
+        
+        faces = None
+        if roi_allowed:
+            faces = self._detect_in_roi(image, scale_boxes(last_faces, scale), min_size,
+                                        self._size_band(state, scale, min_size, max_size)[1])
+            self.stats['roi_scans'] += 1
+            if faces is None:
+                self.stats['roi_misses'] += 1
+        
+        full_scan = faces is None
+        if full_scan:
+            # Periodic full scan, or the face left the ROI
+            self.stats['full_scans'] += 1
+            state['full_scans'] += 1
+            faces = None
+            if state['full_scans'] % FACE_SIZE_RECHECK_INTERVAL:
+                band_min, band_max = self._size_band(state, scale, min_size, max_size)
+                if (band_min, band_max) != (min_size, max_size):
+                    faces = self._scan(image, band_min, band_max)
+                    self.stats['band_scans'] += 1
+                    if len(faces) == 0:
+                        # Nothing in the usual size range - the user may have moved, check all sizes
+                        self.stats['band_misses'] += 1
+                        faces = None
+            if faces is None:
+                faces = self._scan(image, min_size, max_size)
+        
+        if self.tracking:
+            tracker.update(tracking_image, faces)
+        
+        if len(faces) > 0 and scale != 1.0:
+            # Back to frame coordinates, keeping detectMultiScale's (n, 4) array shape
+            faces = np.array(scale_boxes(faces, 1.0 / scale), dtype=np.int32)
+        
+        with self.track_lock:
+            state['faces'] = faces if len(faces) > 0 else None
+            state['since_full_scan'] = 0 if full_scan else state['since_full_scan'] + 1
+            state['scale'] = scale
+            state['sizes'].extend(int(max(w, h)) for (x, y, w, h) in faces)
+        
+        return faces
+    
+    def _detection_image(self, source, products=None):
+        """Backend input image (gray, or BGR for color backends) at detection resolution, and its scale"""
+        if self.scale >= 1.0:
+            return source, 1.0
+        if self.scale == 0.5 and products is not None and source.ndim == 2:
+            # Shared half-resolution product, computed at most once per frame
+            image = products.gray_half
+            return image, image.shape[1] / source.shape[1]
+        
+        width = max(1, int(round(source.shape[1] * self.scale)))
+        height = max(1, int(round(source.shape[0] * self.scale)))
+        shape = (height, width) + source.shape[2:]
+        buffer = getattr(self.resize_buffers, 'image', None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=source.dtype)
+            self.resize_buffers.image = buffer
+        cv2.resize(source, (width, height), dst=buffer, interpolation=cv2.INTER_AREA)
+        return buffer, width / source.shape[1]
+    
+    def _size_band(self, state, scale, min_size, max_size):
+        """minSize/maxSize narrowed to the recently observed face sizes, or the given limits"""
+        with self.track_lock:
+            sizes = list(state['sizes'])
+        if not self.size_band or len(sizes) < FACE_SIZE_MIN_SAMPLES:
+            return min_size, max_size
+        
+        band_min = max(min_size[0], int(min(sizes) * scale * (1.0 - FACE_SIZE_MARGIN)))
+        band_max = max(band_min, int(max(sizes) * scale * (1.0 + FACE_SIZE_MARGIN)) + 1)
+        if max_size[0]:
+            band_max = min(band_max, max_size[0])
+        return (band_min, band_min), (band_max, band_max)
+    
+    def _scan(self, image, min_size, max_size):
+        """One backend detection, counting the pyramid levels it has to scan"""
+        # tile_min_pixels counts frame pixels - `image` is at detection scale
+        frame_pixels = image.shape[0] * image.shape[1] / min(1.0, self.scale) ** 2
+        if self.tile_grid and self.workers > 1 and frame_pixels >= self.tile_min_pixels:
+            return self._scan_tiled(image, min_size, max_size)
+        
+        self.stats['cascade_scans'] += 1
+        self.stats['pyramid_levels'] += pyramid_levels(image.shape, self.backend, min_size, max_size)
+        return self.backend.detect(image, min_size, max_size)
+    
+    def _scan_tiled(self, image, min_size, max_size):
+        """Detect on overlapping tiles concurrently, plus one whole-image pass for faces too big for a tile"""
+        tiles, tile_face = split_tiles(image.shape[1], image.shape[0], *self.tile_grid)
+        small_max = tile_face if not max_size[0] else min(tile_face, max_size[0])
+        self.stats['tiled_scans'] += 1
+        
+        pool = self._get_pool(self.workers)
+        futures = [pool.submit(self._scan_tile, image[y0:y1, x0:x1], min_size, (small_max, small_max))
+                   for (x0, y0, x1, y1) in tiles]
+        
+        boxes = []
+        if not max_size[0] or max_size[0] > tile_face:
+            # Faces larger than the overlap may straddle a seam - the coarse scales are cheap on the whole image
+            large_min = max(min_size[0], tile_face)
+            self.stats['cascade_scans'] += 1
+            self.stats['pyramid_levels'] += pyramid_levels(image.shape, self.backend, (large_min, large_min), max_size)
+            boxes.extend(tuple(box) for box in self.backend.detect(image, (large_min, large_min), max_size))
+        
+        for (x0, y0, x1, y1), future in zip(tiles, futures):
+            boxes.extend((x + x0, y + y0, w, h) for (x, y, w, h) in future.result())
+        
+        boxes = merge_boxes(boxes)
+        if not boxes:
+            return ()
+        return np.array(boxes, dtype=np.int32)
+    
+    def _scan_tile(self, tile, min_size, max_size):
+        """One tile on a pool thread, with that thread's own backend"""
+        backend = self._worker_backend()
+        self.stats['cascade_scans'] += 1
+        self.stats['pyramid_levels'] += pyramid_levels(tile.shape, backend, min_size, max_size)
+        return backend.detect(tile, min_size, max_size)
+    
+    def _worker_backend(self):
+        # Classifiers and networks aren't thread-safe - one backend per worker thread
+        backend = getattr(self.worker_state, 'backend', None)
+        if backend is None:
+            backend = self.backend.clone()
+            self.worker_state.backend = backend
+        return backend
+    
+    def _face_size_limits(self, scale):
+        """minSize/maxSize for the cascade at detection `scale`"""
+        # Never below a cascade's training window - it can't find smaller faces anyway
+        window = self.backend.window_size
+        min_side = max(window[0], window[1], int(round(self.min_face_size * scale)))
+        max_size = (0, 0)
+        if self.max_face_size:
+            max_side = max(min_side, int(round(self.max_face_size * scale)))
+            max_size = (max_side, max_side)
+        return (min_side, min_side), max_size
+    
+    def _detect_in_roi(self, gray, last_faces, min_size, max_size):
+        """Search the expanded bounding box of the last faces; None on a miss"""
+        x0, y0, x1, y1 = self.expand_roi(last_faces, gray.shape[1], gray.shape[0])
+        
+        # A face doesn't shrink much between detections - skip the small scales,
+        # which are most of the cascade's work
+        last_faces = np.asarray(last_faces)
+        min_side = max(min_size[0], int(0.6 * min(last_faces[:, 2].min(), last_faces[:, 3].min())))
+        faces = self._scan(gray[y0:y1, x0:x1], (min_side, min_side), max_size)
+        if len(faces) == 0:
+            return None
+        
+        # Back to frame coordinates
+        faces = np.array(faces, dtype=np.int32)
+        faces[:, 0] += x0
+        faces[:, 1] += y0
+        return faces
+    
+    def expand_roi(self, faces, width, height):
+        """Bounding box of `faces` grown by roi_margin, clipped to the frame, as (x0, y0, x1, y1)"""
+        faces = np.asarray(faces)
+        x0 = faces[:, 0].min()
+        y0 = faces[:, 1].min()
+        x1 = (faces[:, 0] + faces[:, 2]).max()
+        y1 = (faces[:, 1] + faces[:, 3]).max()
+        margin = int(self.roi_margin * max(faces[:, 2].max(), faces[:, 3].max()))
+        return (max(0, int(x0) - margin), max(0, int(y0) - margin),
+                min(width, int(x1) + margin), min(height, int(y1) + margin))
+    
+    def reset_tracking(self, stream=None):
+        """Forget the last faces so the next detection scans the full frame"""
+        with self.track_lock:
+            if stream is None:
+                self.track_states.clear()
+            else:
+                self.track_states.pop(stream, None)
+    
+    def get_tracks(self, stream=0):
+        """(id, (x, y, w, h), confidence) of the faces tracked in `stream`, in frame coordinates"""
+        with self.track_lock:
+            state = self.track_states.get(stream)
+        if state is None:
             return []
+        scale = state['scale']
+        return [(track_id, scale_boxes([box], 1.0 / scale)[0], confidence)
+                for track_id, box, confidence in state['tracker'].get_tracks()]
+    
+    def get_stats(self):
+        stats = dict(self.stats)
+        scans = stats['cascade_scans']
+        stats['levels_per_scan'] = stats['pyramid_levels'] / scans if scans else 0.0
+        if self.quality_gate is not None:
+            stats['quality'] = self.quality_gate.get_stats()
+        checks = stats['eye_checks']
+        stats['eye_ms_per_check'] = stats['eye_time'] * 1000.0 / checks if checks else 0.0
+        return stats
+    
+    def detect_faces_batch(self, frames, workers=DETECTION_WORKERS):
+        """Detect faces in a list of frames on a thread pool.
+        
+        Returns [(faces, seconds), ...] in input order. Every frame gets a
+        full-frame detection at the configured scale - no ROI tracking or
+        motion gate, since batch frames need not be consecutive. Meant for
+        offline reprocessing (e.g. session_recorder.read_session archives).
+        """
+        if not self.wait_until_ready():
+            return [([], 0.0) for _ in frames]
+        
+        # map() keeps input order; detectMultiScale releases the GIL, so workers run in parallel
+        return list(self._get_pool(workers).map(self._detect_batch_frame, frames))
+    
+    def _get_pool(self, workers):
+        """The shared detection thread pool, (re)created for `workers` threads"""
+        with self.batch_pool_lock:
+            workers = max(1, workers)
+            if self.batch_pool is None or self.batch_workers != workers:
+                if self.batch_pool is not None:
+                    self.batch_pool.shutdown(wait=False)
+                self.batch_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='face-detect')
+                self.batch_workers = workers
+            return self.batch_pool
+    
+    def _detect_batch_frame(self, frame):
+        """One batch item on a pool thread: (faces, seconds)"""
+        start = time.perf_counter()
+        if frame is None:
+            return [], 0.0
+        
+        try:
+            backend = self._worker_backend()
+            if not backend.color and frame.ndim == 3:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            image, scale = self._detection_image(frame)
+            min_size, max_size = self._face_size_limits(scale)
+            faces = backend.detect(image, min_size, max_size)
+            if len(faces) > 0 and scale != 1.0:
+                faces = np.array(scale_boxes(faces, 1.0 / scale), dtype=np.int32)
+            return faces, time.perf_counter() - start
+        except Exception as e:
+            print(f"Error in batch face detection: {e}")
+            return [], time.perf_counter() - start
+    
+    def close(self):
+        """Stop the batch detection pool"""
+        with self.batch_pool_lock:
+            if self.batch_pool is not None:
+                self.batch_pool.shutdown(wait=False)
+                self.batch_pool = None
             
     def draw_detection_boxes(self, frame, faces):
         """Draw detection boxes on the frame"""
@@ -75,4 +584,71 @@ class FaceDetector:
             
     def get_detection_status(self, faces):
         """Get detection status based on number of faces detected"""
-        return len(faces) > 0
\ No newline at end of file
+        return len(faces) > 0
+
+def scale_boxes(faces, scale_x, scale_y=None):
+    """Scale (x, y, w, h) boxes, e.g. from frame to preview coordinates"""
+    if scale_y is None:
+        scale_y = scale_x
+    return [(int(round(x * scale_x)), int(round(y * scale_y)),
+             int(round(w * scale_x)), int(round(h * scale_y))) for (x, y, w, h) in faces]
+
+def pyramid_levels(image_shape, backend, min_size=(0, 0), max_size=(0, 0)):
+    """Number of scales detectMultiScale evaluates for an image (1 for non-cascade backends)"""
+    scale_factor = getattr(backend, 'scale_factor', None)
+    window = backend.window_size
+    if not scale_factor or not window[0]:
+        return 1
+    
+    height, width = image_shape[:2]
+    max_w = max_size[0] or width
+    max_h = max_size[1] or height
+    levels = 0
+    factor = 1.0
+    # Same walk as OpenCV: grow the window until it no longer fits the image or maxSize
+    while True:
+        window_w = int(round(window[0] * factor))
+        window_h = int(round(window[1] * factor))
+        if window_w > width or window_h > height or window_w > max_w or window_h > max_h:
+            break
+        if window_w >= min_size[0] and window_h >= min_size[1]:
+            levels += 1
+        factor *= scale_factor
+    return levels
+
+def split_tiles(width, height, columns, rows):
+    """Overlapping tiles as (x0, y0, x1, y1), and the largest face size every tile layout fully contains.
+
+    Neighbouring tiles overlap by that face size, so any face up to it lies
+    completely inside at least one tile.
+    """
+    base_w = -(-width // columns)
+    base_h = -(-height // rows)
+    overlap = min(base_w, base_h) // 2
+    tiles = []
+    for row in range(rows):
+        for column in range(columns):
+            x0 = max(0, column * base_w - overlap)
+            y0 = max(0, row * base_h - overlap)
+            x1 = min(width, (column + 1) * base_w)
+            y1 = min(height, (row + 1) * base_h)
+            if x1 > x0 and y1 > y0:
+                tiles.append((x0, y0, x1, y1))
+    return tiles, overlap
+
+def merge_boxes(boxes, overlap_threshold=0.5):
+    """Drop duplicate boxes from neighbouring tiles, keeping the larger of each overlapping pair"""
+    kept = []
+    for box in sorted(boxes, key=lambda b: b[2] * b[3], reverse=True):
+        x, y, w, h = box
+        duplicate = False
+        for kx, ky, kw, kh in kept:
+            ix = max(0, min(x + w, kx + kw) - max(x, kx))
+            iy = max(0, min(y + h, ky + kh) - max(y, ky))
+            # Relative to the smaller box - a seam-cut partial face lies mostly inside the full one
+            if ix * iy > overlap_threshold * min(w * h, kw * kh):
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(tuple(int(v) for v in box))
+    return kept
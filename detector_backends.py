@@ -0,0 +1,147 @@
+# detector_backends.py
+import cv2
+import numpy as np
+import os
+from config import (CASCADE_PATH, LBP_CASCADE_PATH, DNN_MODEL_PATH, DNN_CONFIG_PATH,
+                    DNN_CONFIDENCE, DNN_INPUT_SIZE, DETECTOR_BACKEND,
+                    DETECTION_SCALE_FACTOR, DETECTION_MIN_NEIGHBORS, EYE_CASCADE_PATH, EYE_MIN_NEIGHBORS)
+
+class CascadeBackend:
+    """Face detection with an OpenCV cascade classifier on a gray image"""
+
+    name = 'cascade'
+    color = False  # detect() takes a gray image
+
+    def __init__(self, model_path, scale_factor=DETECTION_SCALE_FACTOR, min_neighbors=DETECTION_MIN_NEIGHBORS):
+        self.model_path = model_path
+        self.scale_factor = scale_factor  # pyramid step - larger is faster but may skip face sizes
+        self.min_neighbors = min_neighbors  # overlapping hits needed - larger means fewer false positives
+        self.classifier = cv2.CascadeClassifier(model_path)
+        if self.classifier.empty():
+            raise Exception(f"Failed to load cascade classifier: {model_path}")
+        self.window_size = tuple(self.classifier.getOriginalWindowSize())
+
+    def detect(self, image, min_size=(0, 0), max_size=(0, 0)):
+        """(x, y, w, h) boxes in `image` coordinates"""
+        return self.classifier.detectMultiScale(
+            image,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+            maxSize=max_size,
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+
+    def clone(self):
+        """A separate instance for another thread - classifiers aren't thread-safe"""
+        return type(self)(self.model_path, self.scale_factor, self.min_neighbors)
+
+
+class HaarBackend(CascadeBackend):
+    name = 'haar'
+
+    def __init__(self, model_path=None, scale_factor=DETECTION_SCALE_FACTOR, min_neighbors=DETECTION_MIN_NEIGHBORS):
+        if model_path is None:
+            model_path = CASCADE_PATH
+            if not os.path.exists(model_path):
+                # Fallback to OpenCV's built-in cascade
+                model_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        super().__init__(model_path, scale_factor, min_neighbors)
+
+
+class LbpBackend(CascadeBackend):
+    """LBP cascade - integer features, several times faster than Haar at some accuracy cost"""
+
+    name = 'lbp'
+
+    def __init__(self, model_path=LBP_CASCADE_PATH, scale_factor=DETECTION_SCALE_FACTOR,
+                 min_neighbors=DETECTION_MIN_NEIGHBORS):
+        if not os.path.exists(model_path):
+            raise Exception(f"LBP cascade not found: {model_path}")
+        super().__init__(model_path, scale_factor, min_neighbors)
+
+
+class EyeBackend(CascadeBackend):
+    """Eye cascade for the eye-presence stage, run on face regions only"""
+    
+    name = 'eye'
+    
+    def __init__(self, model_path=None, scale_factor=DETECTION_SCALE_FACTOR, min_neighbors=EYE_MIN_NEIGHBORS):
+        if model_path is None:
+            model_path = EYE_CASCADE_PATH
+            if not os.path.exists(model_path):
+                # Fallback to OpenCV's built-in cascade
+                model_path = cv2.data.haarcascades + 'haarcascade_eye.xml'
+        super().__init__(model_path, scale_factor, min_neighbors)
+
+
+class DnnBackend:
+    """OpenCV DNN face detector (SSD, e.g. res10_300x300) on a BGR image"""
+
+    name = 'dnn'
+    color = True  # detect() takes a BGR image
+    window_size = (0, 0)
+
+    def __init__(self, model_path=DNN_MODEL_PATH, config_path=DNN_CONFIG_PATH,
+                 confidence=DNN_CONFIDENCE, input_size=DNN_INPUT_SIZE):
+        for path in (model_path, config_path):
+            if path and not os.path.exists(path):
+                raise Exception(f"DNN face model not found: {path}")
+        self.model_path = model_path
+        self.config_path = config_path
+        self.confidence = confidence
+        self.input_size = input_size
+        self.net = cv2.dnn.readNet(model_path, config_path)
+
+    def detect(self, image, min_size=(0, 0), max_size=(0, 0)):
+        """(x, y, w, h) boxes in `image` coordinates"""
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (self.input_size, self.input_size),
+                                     (104.0, 177.0, 123.0), swapRB=False, crop=False)
+        self.net.setInput(blob)
+        detections = self.net.forward()  # (1, 1, N, 7): _, _, confidence, x0, y0, x1, y1
+
+        boxes = []
+        for detection in detections[0, 0]:
+            if detection[2] < self.confidence:
+                continue
+            x0 = max(0, int(detection[3] * width))
+            y0 = max(0, int(detection[4] * height))
+            x1 = min(width, int(detection[5] * width))
+            y1 = min(height, int(detection[6] * height))
+            w, h = x1 - x0, y1 - y0
+            # The network has no size limits of its own - apply the cascade ones
+            if w <= 0 or h <= 0 or w < min_size[0] or h < min_size[1]:
+                continue
+            if max_size[0] and (w > max_size[0] or h > max_size[1]):
+                continue
+            boxes.append((x0, y0, w, h))
+
+        if not boxes:
+            return ()
+        return np.array(boxes, dtype=np.int32)
+
+    def clone(self):
+        return DnnBackend(self.model_path, self.config_path, self.confidence, self.input_size)
+
+
+# Backend name (DETECTOR_BACKEND) -> class
+DETECTOR_BACKENDS = {
+    'haar': HaarBackend,
+    'lbp': LbpBackend,
+    'dnn': DnnBackend,
+}
+
+def create_detector_backend(name=DETECTOR_BACKEND):
+    """Load the named backend; raises if it is unknown or its model can't be loaded.
+
+    There is no fallback to Haar - a deployment that configured another
+    backend should see the failure (FaceDetector.ready), not run a
+    different detector.
+    """
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend '{name}' - one of {', '.join(DETECTOR_BACKENDS)}")
+
+    backend = DETECTOR_BACKENDS[name]()
+    print(f"Face detector backend: {backend.name} ({backend.model_path})")
+    return backend
@@ -0,0 +1,124 @@
+# face_tracker.py
+import cv2
+import itertools
+import numpy as np
+from config import TRACKER_MIN_CONFIDENCE, TRACKER_SEARCH_MARGIN, TRACKER_MAX_MISSES, TRACKER_TEMPLATE_SIZE
+
+class FaceTrack:
+    """One tracked face: stable id, current box and appearance template"""
+
+    def __init__(self, track_id, box, template):
+        self.id = track_id
+        self.box = box  # (x, y, w, h) in tracking image coordinates
+        self.template = template
+        self.confidence = 1.0
+        self.misses = 0  # detections in a row that didn't find this face
+
+
+class FaceTracker:
+    """Keeps faces alive between detections by template matching around their last position.
+
+    Templates and search windows are shrunk so the face is TRACKER_TEMPLATE_SIZE
+    pixels wide, which makes a tracking step far cheaper than a cascade run.
+    track() returns None once any face's match confidence drops below
+    TRACKER_MIN_CONFIDENCE - the caller should then run detection and
+    hand the result to update(), which matches detections to existing
+    tracks so ids stay stable.
+    """
+
+    def __init__(self, min_confidence=TRACKER_MIN_CONFIDENCE, search_margin=TRACKER_SEARCH_MARGIN,
+                 max_misses=TRACKER_MAX_MISSES, template_size=TRACKER_TEMPLATE_SIZE):
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.max_misses = max_misses
+        self.template_size = template_size
+        self.tracks = []
+        self.ids = itertools.count(1)
+
+    def update(self, gray, faces):
+        """Take a detection result: match faces to tracks, refresh templates, start and drop tracks"""
+        faces = [tuple(int(v) for v in face) for face in faces]
+        unmatched = list(range(len(faces)))
+
+        # Greedy association by overlap, best pairs first
+        pairs = sorted(((_iou(track.box, faces[i]), t, i) for t, track in enumerate(self.tracks)
+                        for i in unmatched), reverse=True)
+        matched_tracks = set()
+        for overlap, t, i in pairs:
+            if overlap <= 0.0:
+                break
+            if t in matched_tracks or i not in unmatched:
+                continue
+            track = self.tracks[t]
+            track.box = faces[i]
+            track.template = self._template(gray, faces[i])
+            track.confidence = 1.0
+            track.misses = 0
+            matched_tracks.add(t)
+            unmatched.remove(i)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        for i in unmatched:
+            template = self._template(gray, faces[i])
+            if template is not None:
+                self.tracks.append(FaceTrack(next(self.ids), faces[i], template))
+
+    def track(self, gray):
+        """Move every live track to its best match; boxes as an (n, 4) array, or None if unsure"""
+        live = [track for track in self.tracks if track.misses == 0]
+        if not live:
+            return None
+
+        for track in live:
+            if not self._track_one(gray, track) or track.confidence < self.min_confidence:
+                return None
+        return np.array([track.box for track in live], dtype=np.int32)
+
+    def get_tracks(self):
+        """(id, box, confidence) of the faces currently tracked"""
+        return [(track.id, track.box, track.confidence) for track in self.tracks if track.misses == 0]
+
+    def clear(self):
+        self.tracks = []
+
+    def _template(self, gray, box):
+        x, y, w, h = box
+        patch = gray[max(0, y):y + h, max(0, x):x + w]
+        if patch.size == 0:
+            return None
+        return cv2.resize(patch, (self.template_size, self.template_size), interpolation=cv2.INTER_AREA)
+
+    def _track_one(self, gray, track):
+        """Template-match one track inside its search window; False if the window left the image"""
+        x, y, w, h = track.box
+        margin = int(self.search_margin * max(w, h))
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(gray.shape[1], x + w + margin), min(gray.shape[0], y + h + margin)
+        if x1 - x0 < w or y1 - y0 < h:
+            return False
+
+        # Search at template scale: the face becomes template_size pixels wide
+        factor_x = self.template_size / w
+        factor_y = self.template_size / h
+        window_size = (max(self.template_size, int(round((x1 - x0) * factor_x))),
+                       max(self.template_size, int(round((y1 - y0) * factor_y))))
+        window = cv2.resize(gray[y0:y1, x0:x1], window_size, interpolation=cv2.INTER_AREA)
+
+        result = cv2.matchTemplate(window, track.template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, location = cv2.minMaxLoc(result)
+        track.confidence = float(confidence)
+        track.box = (x0 + int(round(location[0] / factor_x)), y0 + int(round(location[1] / factor_y)), w, h)
+        return True
+
+
+def _iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    intersection = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - intersection
+    return intersection / union if union > 0 else 0.0
@@ -0,0 +1,87 @@
+# frame_products.py
+import cv2
+import threading
+from collections import OrderedDict
+from config import PREVIEW_WIDTH, PREVIEW_HEIGHT
+
+def _gray(products):
+    return cv2.cvtColor(products.frame, cv2.COLOR_BGR2GRAY)
+
+def _gray_half(products):
+    gray = products.gray
+    return cv2.resize(gray, (gray.shape[1] // 2, gray.shape[0] // 2), interpolation=cv2.INTER_AREA)
+
+def _preview_rgb(products):
+    # Downscale first so the colour conversion touches fewer pixels
+    small = cv2.resize(products.frame, (PREVIEW_WIDTH, PREVIEW_HEIGHT), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+
+# Product name -> builder(products); builders may use other products
+PRODUCT_BUILDERS = {
+    'gray': _gray,
+    'gray_half': _gray_half,
+    'preview_rgb': _preview_rgb,
+}
+
+class FrameProducts:
+    """Derived images of one frame, each computed lazily and at most once"""
+    
+    def __init__(self, frame, sequence):
+        self.frame = frame
+        self.sequence = sequence
+        self._products = {}
+        self._lock = threading.RLock()
+    
+    def get(self, name):
+        """Get a product by name, computing it on first use"""
+        product = self._products.get(name)
+        if product is not None:
+            return product
+        
+        with self._lock:
+            # Another consumer may have computed it while we waited
+            product = self._products.get(name)
+            if product is None:
+                product = PRODUCT_BUILDERS[name](self)
+                product.flags.writeable = False  # shared by every consumer
+                self._products[name] = product
+            return product
+    
+    def has(self, name):
+        return name in self._products
+    
+    @property
+    def gray(self):
+        return self.get('gray')
+    
+    @property
+    def gray_half(self):
+        return self.get('gray_half')
+    
+    @property
+    def preview_rgb(self):
+        return self.get('preview_rgb')
+
+
+class FrameProductCache:
+    """Keeps FrameProducts for the most recent frame sequences"""
+    
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, frame, sequence):
+        """Get the products of frame `sequence`, creating them on first request"""
+        with self._lock:
+            products = self._entries.get(sequence)
+            if products is None:
+                products = FrameProducts(frame, sequence)
+                self._entries[sequence] = products
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return products
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,86 @@
+# frame_quality.py
+import cv2
+import numpy as np
+from config import (FRAME_QUALITY_THUMBNAIL_SIZE, FRAME_DARK_MEAN, FRAME_OVEREXPOSED_LEVEL,
+                    FRAME_OVEREXPOSED_FRACTION, FRAME_BLUR_THRESHOLD, FRAME_BLUR_MIN_CONTRAST,
+                    FRAME_SKIN_CHECK, FRAME_SKIN_MIN_FRACTION)
+
+# Rejection reasons
+QUALITY_DARK = 'dark'                # too little light to see a face
+QUALITY_OVEREXPOSED = 'overexposed'  # mostly saturated, e.g. camera facing a lamp or window
+QUALITY_BLURRED = 'blurred'          # out of focus, motion-smeared or a covered lens
+QUALITY_NO_SKIN = 'no_skin'          # usable frame, but nothing skin-colored - can't hold a face
+QUALITY_NOT_READY = 'not_ready'      # set by FaceDetector: the detector isn't loaded, nothing was checked
+
+# Reasons for which the frame can't tell whether a face is there
+UNUSABLE_REASONS = (QUALITY_DARK, QUALITY_OVEREXPOSED, QUALITY_BLURRED, QUALITY_NOT_READY)
+
+# Reasons the cascade still runs for: the frame is only unusable if it finds no face either.
+# The cascade sees through far more blur than the sharpness measure can tell apart
+CASCADE_CHECKED_REASONS = (QUALITY_BLURRED,)
+
+class FrameQualityGate:
+    """Cheap checks on a small thumbnail that reject frames before the cascade runs.
+
+    check() returns None for a usable frame, else the reason. Frames that are
+    dark or overexposed are unusable: the detector reports them as "unknown"
+    instead of "no face" without running the cascade. A blurred frame still
+    runs it and is only unknown when no face turns up. A frame without edges
+    only counts as blurred while it still shows coarse structure; a
+    featureless scene (a plain wall, an empty synthetic frame) is usable and
+    holds no face. The optional skin check rejects usable frames without any
+    skin-colored pixels, which are reported as "no face" without running the
+    cascade.
+    """
+
+    def __init__(self, dark_mean=FRAME_DARK_MEAN, overexposed_level=FRAME_OVEREXPOSED_LEVEL,
+                 overexposed_fraction=FRAME_OVEREXPOSED_FRACTION, blur_threshold=FRAME_BLUR_THRESHOLD,
+                 blur_min_contrast=FRAME_BLUR_MIN_CONTRAST, skin_check=FRAME_SKIN_CHECK,
+                 skin_min_fraction=FRAME_SKIN_MIN_FRACTION):
+        self.dark_mean = dark_mean
+        self.overexposed_level = overexposed_level
+        self.overexposed_fraction = overexposed_fraction
+        self.blur_threshold = blur_threshold
+        self.blur_min_contrast = blur_min_contrast
+        self.skin_check = skin_check
+        self.skin_min_fraction = skin_min_fraction
+        self.counts = {'checked': 0, 'passed': 0, QUALITY_DARK: 0, QUALITY_OVEREXPOSED: 0,
+                       QUALITY_BLURRED: 0, QUALITY_NO_SKIN: 0}
+
+    def check(self, gray, frame=None):
+        """Rejection reason for a frame (gray image, BGR frame for the skin check), or None if usable"""
+        reason = self._reason(gray, frame)
+        self.counts['checked'] += 1
+        self.counts[reason or 'passed'] += 1
+        return reason
+
+    def _reason(self, gray, frame):
+        thumbnail = cv2.resize(gray, FRAME_QUALITY_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+        # Exposure first - dark and saturated frames have no texture either
+        if cv2.mean(thumbnail)[0] < self.dark_mean:
+            return QUALITY_DARK
+        saturated = np.count_nonzero(thumbnail >= self.overexposed_level)
+        if saturated > self.overexposed_fraction * thumbnail.size:
+            return QUALITY_OVEREXPOSED
+
+        # Sharpness: variance of the Laplacian, low when there are no edges
+        laplacian = cv2.Laplacian(thumbnail, cv2.CV_16S)
+        if cv2.meanStdDev(laplacian)[1][0, 0] ** 2 < self.blur_threshold:
+            # Blur keeps coarse shapes; without them the scene is just featureless
+            height, width = thumbnail.shape[:2]
+            coarse = cv2.resize(thumbnail, (width // 4, height // 4), interpolation=cv2.INTER_AREA)
+            if cv2.meanStdDev(cv2.Laplacian(coarse, cv2.CV_16S))[1][0, 0] >= self.blur_min_contrast:
+                return QUALITY_BLURRED
+
+        if self.skin_check and frame is not None and frame.ndim == 3:
+            small = cv2.resize(frame, FRAME_QUALITY_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+            # Common skin range in YCrCb, wide enough for most skin tones and lighting
+            skin = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb), (0, 133, 77), (255, 173, 127))
+            if np.count_nonzero(skin) < self.skin_min_fraction * skin.size:
+                return QUALITY_NO_SKIN
+        return None
+
+    def get_stats(self):
+        """Frames checked, passed and rejected per reason"""
+        return dict(self.counts)
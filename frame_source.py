@@ -0,0 +1,374 @@
+# frame_source.py
+import cv2
+import numpy as np
+import os
+import time
+from config import (CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, CAMERA_NEGOTIATE_FORMAT,
+                    FRAME_SOURCE, FRAME_SOURCE_PATH, FRAME_SOURCE_REALTIME)
+from capture_negotiation import negotiate_capture_mode, is_mode_cached, open_capture, describe_capture
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+class FramePacer:
+    """Paces reads to a target fps, or lets them run as fast as possible"""
+    
+    def __init__(self, fps, realtime=True):
+        self.interval = 1.0 / fps if fps and fps > 0 else 0.0
+        self.realtime = realtime
+        self.next_deadline = None
+    
+    def reset(self):
+        self.next_deadline = None
+    
+    def wait(self):
+        """Sleep until the next frame is due (no-op when not real-time)"""
+        if not self.realtime or self.interval <= 0:
+            return
+        
+        now = time.monotonic()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        elif self.next_deadline > now:
+            time.sleep(self.next_deadline - now)
+        elif now - self.next_deadline > self.interval:
+            # Fell behind by more than a frame - don't burst to catch up
+            self.next_deadline = now
+        self.next_deadline += self.interval
+
+
+class FrameSource:
+    """Base class for frame sources.
+    
+    Mirrors the subset of cv2.VideoCapture used by CameraManager so a source
+    can stand in for a device: open(), isOpened(), read(image=None),
+    set()/get() and release(). read() fills `image` in place when it has the
+    right shape, like VideoCapture.read(image=...).
+    """
+    
+    name = 'source'
+    
+    def __init__(self, fps=CAMERA_FPS, realtime=True):
+        self.fps = fps
+        self.pacer = FramePacer(fps, realtime)
+        self.opened = False
+        self.finished = False  # set by non-looping sources at end of stream
+        self.capture_mode = None  # what the source actually delivers, see DeviceSource
+    
+    def open(self):
+        """Open the source, returns True on success"""
+        self.opened = True
+        self.finished = False
+        self.pacer.reset()
+        return True
+    
+    def isOpened(self):
+        return self.opened
+    
+    def needs_negotiation(self):
+        """True when open() would first probe capture modes, which can take seconds"""
+        return False
+    
+    def read(self, image=None):
+        if not self.opened:
+            return False, None
+        self.pacer.wait()
+        return self._read(image)
+    
+    def _read(self, image):
+        raise NotImplementedError
+    
+    def set(self, prop, value):
+        return False
+    
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        return 0.0
+    
+    def release(self):
+        self.opened = False
+    
+    @staticmethod
+    def _into(image, frame):
+        """Copy `frame` into `image` when shapes match, mirroring VideoCapture.read(image=...)"""
+        if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+            np.copyto(image, frame)
+            return image
+        return frame
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class DeviceSource(FrameSource):
+    """Live camera device; the device itself paces frames"""
+    
+    def __init__(self, indices=(0, 1), width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS,
+                 negotiate=CAMERA_NEGOTIATE_FORMAT):
+        super().__init__(fps=fps, realtime=False)
+        self.indices = indices
+        self.width = width
+        self.height = height
+        self.negotiate = negotiate
+        self.negotiated_modes = {}  # device index -> chosen mode, probed once per source
+        self.capture = None
+        self.index = None
+        self.name = f"device{list(indices)}"
+    
+    def open(self):
+        self.release()
+        for index in self.indices:
+            capture, mode = self._open_index(index)
+            if capture is not None:
+                self.capture = capture
+                self.index = index
+                break
+        
+        if self.capture is None:
+            return False
+        
+        # Report what the driver delivered, not what was asked for
+        self.capture_mode = describe_capture(self.capture)
+        self.capture_mode['index'] = self.index
+        self.capture_mode['negotiated'] = mode is not None
+        if mode is not None:
+            self.capture_mode['cpu_ms_per_frame'] = mode.get('cpu_ms_per_frame')
+            self.capture_mode['measured_fps'] = mode.get('measured_fps')
+        print(f"Capture mode: {self.capture_mode['backend']} {self.capture_mode['fourcc'] or '?'} "
+              f"{self.capture_mode['width']}x{self.capture_mode['height']} @ {self.capture_mode['fps']:.0f} fps")
+        
+        self.opened = True
+        return True
+    
+    def needs_negotiation(self):
+        # open() tries the indices in order - only the first one is probed for sure
+        if not self.negotiate or not self.indices:
+            return False
+        index = self.indices[0]
+        return index not in self.negotiated_modes and not is_mode_cached(index, self.width, self.height, self.fps)
+    
+    def _open_index(self, index):
+        """Open one device index, using the negotiated backend/format when enabled"""
+        mode = None
+        if self.negotiate:
+            if index not in self.negotiated_modes:
+                self.negotiated_modes[index] = negotiate_capture_mode(index, self.width, self.height, self.fps)
+            mode = self.negotiated_modes[index]
+        
+        if mode is not None:
+            capture = open_capture(index, mode['backend_api'], mode['requested_fourcc'],
+                                   self.width, self.height, self.fps)
+            if capture is not None:
+                return capture, mode
+        
+        # Default backend and format
+        capture = open_capture(index, cv2.CAP_ANY, None, self.width, self.height, self.fps)
+        return capture, None
+    
+    def isOpened(self):
+        return self.capture is not None and self.capture.isOpened()
+    
+    def read(self, image=None):
+        if self.capture is None:
+            return False, None
+        return self.capture.read(image)
+    
+    def set(self, prop, value):
+        return self.capture.set(prop, value) if self.capture is not None else False
+    
+    def get(self, prop):
+        return self.capture.get(prop) if self.capture is not None else 0.0
+    
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        self.opened = False
+
+
+class VideoFileSource(FrameSource):
+    """Frames decoded from a video file, paced at the file's own fps when real-time"""
+    
+    def __init__(self, path, realtime=True, loop=True, fps=None):
+        super().__init__(fps=fps, realtime=realtime)
+        self.path = path
+        self.loop = loop
+        self.capture = None
+        self.name = os.path.basename(path)
+    
+    def open(self):
+        self.release()
+        if not os.path.exists(self.path):
+            print(f"Video file not found: {self.path}")
+            return False
+        
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            self.capture = None
+            return False
+        
+        if not self.fps:
+            self.fps = self.capture.get(cv2.CAP_PROP_FPS) or CAMERA_FPS
+        self.pacer = FramePacer(self.fps, self.pacer.realtime)
+        return super().open()
+    
+    def _read(self, image):
+        ret, frame = self.capture.read(image)
+        if not ret and self.loop:
+            # Rewind and keep going
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read(image)
+        elif not ret:
+            self.finished = True
+        return ret, frame
+    
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        super().release()
+
+
+class ImageSequenceSource(FrameSource):
+    """Frames loaded from a directory of images, in file name order"""
+    
+    def __init__(self, directory, fps=CAMERA_FPS, realtime=True, loop=True, preload=True):
+        super().__init__(fps=fps, realtime=realtime)
+        self.directory = directory
+        self.loop = loop
+        self.preload = preload
+        self.files = []
+        self.frames = None
+        self.position = 0
+        self.name = os.path.basename(os.path.normpath(directory))
+    
+    def open(self):
+        if not os.path.isdir(self.directory):
+            print(f"Image directory not found: {self.directory}")
+            return False
+        
+        self.files = sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            print(f"No images found in: {self.directory}")
+            return False
+        
+        # Decode up front so disk and decode time stay out of pipeline measurements
+        if self.preload and self.frames is None:
+            self.frames = [cv2.imread(path) for path in self.files]
+        
+        self.position = 0
+        return super().open()
+    
+    def _read(self, image):
+        if self.position >= len(self.files):
+            if not self.loop:
+                self.finished = True
+                return False, None
+            self.position = 0
+        
+        if self.frames is not None:
+            frame = self.frames[self.position]
+        else:
+            frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        
+        if frame is None:
+            return False, None
+        return True, self._into(image, frame)
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames with or without a drawn face.
+    
+    The face is shown for `face_frames` frames and hidden for `empty_frames`
+    frames, repeating; set empty_frames=0 for a face in every frame or
+    face_frames=0 for none. The face drifts slightly so consecutive frames
+    differ like a real scene.
+    """
+    
+    def __init__(self, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS, realtime=True,
+                 face_frames=1, empty_frames=0, face_size=None, noise=4):
+        super().__init__(fps=fps, realtime=realtime)
+        self.width = width
+        self.height = height
+        self.face_frames = face_frames
+        self.empty_frames = empty_frames
+        self.face_size = face_size or height // 5
+        self.noise = noise
+        self.frame_index = 0
+        self.background = None
+        self.noise_frames = None
+        self.name = f"synthetic{width}x{height}"
+    
+    def open(self):
+        # Precompute the background and a few noise patterns so generation stays cheap
+        gradient = np.linspace(90, 150, self.width, dtype=np.uint8)
+        self.background = np.repeat(np.tile(gradient, (self.height, 1))[:, :, None], 3, axis=2)
+        rng = np.random.default_rng(0)
+        self.noise_frames = [
+            rng.integers(0, self.noise + 1, self.background.shape, dtype=np.uint8)
+            for _ in range(4)
+        ] if self.noise else None
+        self.frame_index = 0
+        return super().open()
+    
+    def has_face(self, index):
+        """Whether frame `index` contains a face"""
+        cycle = self.face_frames + self.empty_frames
+        if cycle <= 0 or self.face_frames <= 0:
+            return False
+        return index % cycle < self.face_frames
+    
+    def _read(self, image):
+        shape = (self.height, self.width, 3)
+        frame = image if image is not None and image.shape == shape and image.dtype == np.uint8 else np.empty(shape, np.uint8)
+        
+        if self.noise_frames is not None:
+            np.add(self.background, self.noise_frames[self.frame_index % len(self.noise_frames)], out=frame)
+        else:
+            np.copyto(frame, self.background)
+        
+        if self.has_face(self.frame_index):
+            drift = int(6 * np.sin(self.frame_index / 15.0))
+            draw_synthetic_face(frame, self.width // 2 + drift, self.height // 2, self.face_size)
+        
+        self.frame_index += 1
+        return True, frame
+    
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return super().get(prop)
+
+
+def draw_synthetic_face(frame, cx, cy, radius):
+    """Draw a simple frontal face the Haar cascade recognises"""
+    r = radius
+    cv2.ellipse(frame, (cx, cy), (int(r * 0.78), r), 0, 0, 360, (150, 170, 200), -1)
+    for dx in (-int(r * 0.36), int(r * 0.36)):
+        # Eyes and brows
+        cv2.ellipse(frame, (cx + dx, cy - int(r * 0.22)), (int(r * 0.18), int(r * 0.09)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.line(frame, (cx + dx - int(r * 0.22), cy - int(r * 0.45)), (cx + dx + int(r * 0.2), cy - int(r * 0.47)),
+                 (50, 50, 50), max(2, r // 18))
+    # Nose and mouth
+    cv2.line(frame, (cx, cy - int(r * 0.1)), (cx - int(r * 0.07), cy + int(r * 0.28)), (110, 120, 150), max(2, r // 22))
+    cv2.ellipse(frame, (cx, cy + int(r * 0.53)), (int(r * 0.3), int(r * 0.11)), 0, 0, 360, (60, 60, 120), -1)
+    return frame
+
+
+def create_frame_source(kind=FRAME_SOURCE, path=FRAME_SOURCE_PATH, realtime=FRAME_SOURCE_REALTIME):
+    """Create a frame source from config ('device', 'video', 'images' or 'synthetic')"""
+    if kind == 'device':
+        return DeviceSource()
+    if kind == 'video':
+        return VideoFileSource(path, realtime=realtime)
+    if kind == 'images':
+        return ImageSequenceSource(path, realtime=realtime)
+    if kind == 'synthetic':
+        return SyntheticSource(realtime=realtime)
+    raise ValueError(f"Unknown frame source: {kind}")
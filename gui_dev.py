@@ -1,23 +1,28 @@
 # gui_dev.py
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import cv2
 from PIL import Image, ImageTk
 import datetime
-from config import LOGO_PATH
+from config import LOGO_PATH, PREVIEW_DETECTION_INTERVAL, CAMERA_FPS
+from detector import scale_boxes
 import os
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
 class DeveloperGUI:
-    def __init__(self, root, state_manager, logger, camera_manager, face_detector):
+    def __init__(self, root, state_manager, logger, camera_manager, face_detector, detection_service):
         self.root = root
         self.state_manager = state_manager
         self.logger = logger
         self.camera_manager = camera_manager
         self.face_detector = face_detector
+        self.detection_service = detection_service
+        self.last_frame_sequence = 0
         
+        # Boxes in the live preview come from the detection service - detect more often while it's shown
+        self.detection_service.set_interval(PREVIEW_DETECTION_INTERVAL)
+
         # Start monitoring when entering developer mode
         self.state_manager.start_monitoring()
         
@@ -111,6 +116,17 @@ class DeveloperGUI:
                      font=('Arial', 9, 'bold'))
         self.monitoring_status_label.grid(row=5, column=1, sticky=tk.W)
         
+        ttk.Label(status_frame, text="Kamera:", font=('Arial', 9)).grid(row=6, column=0, sticky=tk.W, padx=(0, 10))
+        self.camera_status_var = tk.StringVar(value="-")
+        self.camera_status_label = ttk.Label(status_frame, textvariable=self.camera_status_var,
+                     font=('Arial', 9, 'bold'))
+        self.camera_status_label.grid(row=6, column=1, sticky=tk.W)
+        
+        ttk.Label(status_frame, text="Transisi:", font=('Arial', 9)).grid(row=7, column=0, sticky=tk.W, padx=(0, 10))
+        self.transition_status_var = tk.StringVar(value="-")
+        ttk.Label(status_frame, textvariable=self.transition_status_var,
+                  font=('Arial', 9, 'bold')).grid(row=7, column=1, sticky=tk.W)
+
         # Right frame - Graph and logs
         right_frame = ttk.Frame(main_frame)
         right_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -236,34 +252,42 @@ class DeveloperGUI:
                 
     def start_camera_feed(self):
         """Start updating camera feed"""
-        if self.camera_manager.is_camera_available():
+        # The camera may still be waking from idle, so only require a running capture thread
+        if self.camera_manager.is_running:
             self.update_camera_feed()
         else:
             self.camera_label.configure(text="Kamera tidak tersedia")
             
     def update_camera_feed(self):
         """Update camera feed with face detection"""
-        frame = self.camera_manager.get_frame()
+        frame, sequence = self.camera_manager.get_frame_with_sequence()
+        
+        if frame is None or sequence == self.last_frame_sequence:
+            # No new frame yet - check again after about one frame period without reprocessing a stale frame
+            self.root.after(max(10, int(1000 / CAMERA_FPS)), self.update_camera_feed)
+            return
+        
+        self.last_frame_sequence = sequence
+        # Gray and preview images are computed once per frame and shared with the detection service
+        products = self.camera_manager.get_frame_products(frame, sequence)
+        
+        # Latest detection of this camera - the service feeds the state manager itself
+        result = self.detection_service.get_result(0)
+        faces = result['faces'] if result else []
+
+        # Draw detection boxes on the preview-sized RGB image, scaled from frame coordinates
+        preview = products.preview_rgb.copy()
+        scale_x = preview.shape[1] / frame.shape[1]
+        scale_y = preview.shape[0] / frame.shape[0]
+        preview = self.face_detector.draw_detection_boxes(preview, scale_boxes(faces, scale_x, scale_y))
+        
+        # Convert to PhotoImage
+        img = Image.fromarray(preview)
+        photo = ImageTk.PhotoImage(image=img)
+        
+        self.camera_label.configure(image=photo)
+        self.camera_label.image = photo
         
-        if frame is not None:
-            # Detect faces
-            faces = self.face_detector.detect_faces(frame)
-            
-            # Update state manager (only if monitoring is active)
-            self.state_manager.update_face_detection(len(faces) > 0)
-            
-            # Draw detection boxes
-            frame_with_boxes = self.face_detector.draw_detection_boxes(frame.copy(), faces)
-            
-            # Convert to PhotoImage
-            rgb_frame = cv2.cvtColor(frame_with_boxes, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(rgb_frame)
-            img = img.resize((400, 300), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image=img)
-            
-            self.camera_label.configure(image=photo)
-            self.camera_label.image = photo
-            
         # Schedule next update
         self.root.after(50, self.update_camera_feed)
         
@@ -272,7 +296,10 @@ class DeveloperGUI:
         state = self.state_manager.get_current_state()
         
         # Update status labels
-        self.face_status_var.set("TERDETEKSI" if state['face_detected'] else "TIDAK TERDETEKSI")
+        if state['face_detected']:
+            self.face_status_var.set("TERDETEKSI")
+        else:
+            self.face_status_var.set("MELIHAT KE ARAH LAIN" if state['looking_away'] else "TIDAK TERDETEKSI")
         
         # Tampilkan screen time maksimal 20 detik
         screen_time_display = f"{min(state['screen_time'], 20)} detik"
@@ -301,6 +328,20 @@ class DeveloperGUI:
         self.session_status_label.configure(foreground=session_color)
         self.monitoring_status_label.configure(foreground=monitoring_color)
         
+        # Camera health from the capture watchdog
+        health = self.camera_manager.get_health()
+        self.camera_status_var.set(
+            f"{health['state'].upper()} - {health['fps']:.1f} fps (reconnect: {health['reconnect_count']})"
+        )
+        self.camera_status_label.configure(foreground='green' if health['state'] == 'ok' else 'orange')
+        
+        # Raw detector flips vs state changes that got through the presence filter
+        presence = self.state_manager.get_presence_stats()
+        self.transition_status_var.set(
+            f"mentah {presence['raw_transitions']} / terfilter {presence['filtered_transitions']}"
+            f" / tak diketahui {presence['unknown_results']}"
+        )
+        
         # Update screen time color based on warning level
         if state['screen_time'] >= 15 and state['screen_time'] < 20:
             self.screen_time_label.configure(foreground='orange')
@@ -376,4 +417,5 @@ class DeveloperGUI:
     def on_close(self):
         """Handle window close - stop monitoring before closing"""
         self.state_manager.stop_monitoring()
+        self.detection_service.reset_interval()
         self.root.destroy()
\ No newline at end of file
@@ -3,20 +3,22 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import sys
 import os
-import threading
+import multiprocessing
 import time
 import cv2
 
 # Add current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import DEV_PASSWORD
+from config import DEV_PASSWORD, RECORDING_ENABLED
 from state_manager import StateManager
 from logger_db import DatabaseLogger
-from camera import CameraManager
+from multi_camera import MultiCameraManager
 from detector import FaceDetector
 from gui_user import UserGUI
 from gui_dev import DeveloperGUI
+from session_recorder import SessionRecorder
+from detection_service import DetectionService
 
 class MainApplication:
     def __init__(self):
@@ -26,23 +28,28 @@ class MainApplication:
         # Initialize components
         self.logger = DatabaseLogger()
         self.state_manager = StateManager()
-        self.camera_manager = CameraManager()
+        self.camera_manager = MultiCameraManager()  # one camera unless CAMERA_DEVICE_INDICES lists more
         self.face_detector = FaceDetector()
+        # The detector loads in the background - a failed load must not pass silently as "no face"
+        self.face_detector.ready.add_done_callback(self._on_detector_loaded)
+        self.recorder = SessionRecorder() if RECORDING_ENABLED else None
         
         # Set up callbacks
         self.state_manager.on_popup_callback = self.show_popup_warning
         self.state_manager.on_break_complete_callback = self.show_break_complete
         
-        # Start camera but DON'T start monitoring yet
-        self.camera_manager.start_camera()
+        # Start camera but DON'T start monitoring yet - idle it until a mode starts
+        if self.camera_manager.start_camera():
+            self.camera_manager.idle()
         
         # Track active windows
         self.active_user_window = None
         self.active_dev_window = None
         
-        # Face detection control
-        self.face_detection_active = False
-        self.face_detection_thread = None
+        # Face detection runs once per frame in the service; the state manager and the
+        # developer preview consume its results. Only detect while monitoring
+        self.detection_service = DetectionService(self.camera_manager, self.face_detector,
+                                                  should_run=lambda: self.state_manager.monitoring_active)
         
         # Start universal face detection
         self.start_universal_face_detection()
@@ -143,48 +150,32 @@ class MainApplication:
         
         self.root.geometry(f"{width}x{height}+{x}+{y}")
         
+    def _on_detector_loaded(self, ready):
+        """Detector load finished (on the loader thread) - tell the user if it failed"""
+        error = ready.exception()
+        if error is not None:
+            self.root.after(0, lambda: messagebox.showerror(
+                "Error", f"Detektor wajah gagal dimuat:\n{error}\n\nDeteksi wajah tidak berjalan."))
+    
+    def _detector_failed(self):
+        return self.face_detector.ready.done() and self.face_detector.ready.exception() is not None
+        
     def start_universal_face_detection(self):
         """Start universal face detection that works for both modes"""
-        self.face_detection_active = True
-        self.face_detection_thread = threading.Thread(target=self._face_detection_loop)
-        self.face_detection_thread.daemon = True
-        self.face_detection_thread.start()
-        print("🔍 Universal face detection started")
-        
-    def _face_detection_loop(self):
-        """Universal face detection loop for both user and developer modes"""
-        while self.face_detection_active:
-            try:
-                # Only process if monitoring is active (in user or developer mode)
-                if self.state_manager.monitoring_active:
-                    frame = self.camera_manager.get_frame()
-                    
-                    if frame is not None:
-                        faces = self.face_detector.detect_faces(frame)
-                        face_detected = len(faces) > 0
-                        
-                        # Update state manager
-                        self.state_manager.update_face_detection(face_detected)
-                        
-                        # Debug log occasionally
-                        if hasattr(self, 'detection_counter'):
-                            self.detection_counter += 1
-                            if self.detection_counter % 30 == 0:  # Log every 30 detections
-                                status = "terdeteksi" if face_detected else "tidak terdeteksi"
-                                print(f"🔍 Face detection: {status} ({len(faces)} faces)")
-                        else:
-                            self.detection_counter = 0
-                    else:
-                        print(" No frame available for face detection")
-                else:
-                    # Monitoring not active, sleep longer to save resources
-                    time.sleep(2)
-                    
-            except Exception as e:
-                print(f"Face detection error: {e}")
-                
-            time.sleep(0.5)  # Check every 0.5 seconds
-            
+        self.detection_service.subscribe(self._on_detection)
+        self.detection_service.start()
+        
+    def _on_detection(self, result):
+        """Detection service subscriber: feed the state manager (and the recorder)"""
+        # Presence is fused over all cameras
+        self.state_manager.update_face_detection(result['present'], result['eyes'])
+        
+        if self.recorder:
+            # Detection may outlast the frame's ring slot - only record a frame that is still the detected one
+            index, sequence = result['camera'], result['sequence']
+            self.recorder.record(result['frame'], sequence, result['timestamp'], result['faces'], index,
+                                 is_valid=lambda: self.camera_manager.is_camera_frame_valid(index, sequence))
+
     def start_user_mode(self):
         """Start user mode interface"""
         print("Starting User Mode...")
@@ -196,13 +187,15 @@ class MainApplication:
         if self.active_dev_window:
             self.active_dev_window.destroy()
             self.active_dev_window = None
-            
+        
+        if self._detector_failed():
+            messagebox.showerror("Error", "Detektor wajah tidak tersedia")
+            return
+        
         # Ensure camera is running
-        if not self.camera_manager.is_camera_available():
-            success = self.camera_manager.restart_camera()
-            if not success:
-                messagebox.showerror("Error", "Tidak dapat mengakses kamera")
-                return
+        if not self._resume_camera():
+            messagebox.showerror("Error", "Tidak dapat mengakses kamera")
+            return
         
         self.root.withdraw()  # Hide main window
         
@@ -218,6 +211,7 @@ class MainApplication:
         # Handle window close
         user_window.protocol("WM_DELETE_WINDOW", lambda: self.on_user_close(user_window))
         
+        self._start_recording("user")
         print("User Mode started successfully")
         
     def authenticate_developer(self):
@@ -244,13 +238,15 @@ class MainApplication:
         if self.active_user_window:
             self.active_user_window.destroy()
             self.active_user_window = None
-            
+        
+        if self._detector_failed():
+            messagebox.showerror("Error", "Detektor wajah tidak tersedia")
+            return
+        
         # Ensure camera is running
-        if not self.camera_manager.is_camera_available():
-            success = self.camera_manager.restart_camera()
-            if not success:
-                messagebox.showerror("Error", "Tidak dapat mengakses kamera")
-                return
+        if not self._resume_camera():
+            messagebox.showerror("Error", "Tidak dapat mengakses kamera")
+            return
             
         self.root.withdraw()  # Hide main window
         
@@ -261,14 +257,36 @@ class MainApplication:
         
         # Create developer GUI and store reference
         dev_gui = DeveloperGUI(dev_window, self.state_manager, self.logger, 
-                             self.camera_manager, self.face_detector)
+                             self.camera_manager, self.face_detector, self.detection_service)
         self.active_dev_window = dev_window
         
         # Handle window close
         dev_window.protocol("WM_DELETE_WINDOW", lambda: self.on_dev_close(dev_window))
         
+        self._start_recording("developer")
         print("Developer Mode started successfully")
         
+    def _resume_camera(self):
+        """Wake the camera from idle for user/developer mode"""
+        # Fast path - the capture thread reopens the device itself, nothing blocks here
+        if self.camera_manager.resume():
+            return True
+        
+        # Camera was never started (or its thread died) - start it again. No settle
+        # delay is needed here: reconnects of a running camera are handled by its watchdog
+        self.camera_manager.stop_camera()
+        return self.camera_manager.start_camera()
+    
+    def _start_recording(self, mode):
+        """Start a new session archive if recording is enabled"""
+        if self.recorder:
+            self.recorder.stop()
+            self.recorder.start(f"{mode}_{time.strftime('%Y%m%d_%H%M%S')}")
+    
+    def _stop_recording(self):
+        if self.recorder:
+            self.recorder.stop()
+    
     def center_window_on_screen(self, window, width, height):
         """Center a window on screen"""
         screen_width = window.winfo_screenwidth()
@@ -284,6 +302,8 @@ class MainApplication:
         user_window.destroy()
         self.active_user_window = None
         self.state_manager.stop_monitoring()  # Ensure monitoring stops
+        self._stop_recording()
+        self.camera_manager.idle()
         self.root.deiconify()  # Show main window again
         print("User mode closed")
         
@@ -292,6 +312,9 @@ class MainApplication:
         dev_window.destroy()
         self.active_dev_window = None
         self.state_manager.stop_monitoring()  # Ensure monitoring stops
+        self.detection_service.reset_interval()
+        self._stop_recording()
+        self.camera_manager.idle()
         self.root.deiconify()  # Show main window again
         print("Developer mode closed")
         
@@ -344,10 +367,12 @@ class MainApplication:
         """Clean up resources and exit"""
         try:
             print("Cleaning up resources...")
-            self.face_detection_active = False
+            self.detection_service.stop()
             self.state_manager.stop_monitoring()
             self.state_manager.cleanup()
+            self._stop_recording()
             self.camera_manager.stop_camera()
+            self.face_detector.close()
             self.logger.log_activity("SYSTEM", "Aplikasi ditutup")
             
             # Close any active windows
@@ -379,6 +404,9 @@ class MainApplication:
             self.cleanup_and_exit()
 
 if __name__ == "__main__":
+    # Required for CAPTURE_MODE = 'process' in the frozen executable
+    multiprocessing.freeze_support()
+    
     # Set up error handling
     try:
         app = MainApplication()
@@ -0,0 +1,167 @@
+# multi_camera.py
+import threading
+import time
+from camera import CameraManager
+from frame_source import DeviceSource, create_frame_source
+from config import CAMERA_DEVICE_INDICES, CAMERA_DETECTION_WEIGHTS, PRESENCE_FUSION, DETECTION_INTERVAL
+
+# Presence fusion policies
+FUSION_ANY = 'any'            # present if any camera sees a face
+FUSION_MAJORITY = 'majority'  # present if more than half of the reporting cameras see a face
+FUSION_ALL = 'all'            # present only if every reporting camera sees a face
+
+class PresenceFusion:
+    """Combines the latest per-camera detection results into one presence value"""
+    
+    def __init__(self, camera_count, policy=PRESENCE_FUSION, max_age=None):
+        if policy not in (FUSION_ANY, FUSION_MAJORITY, FUSION_ALL):
+            raise ValueError(f"Unknown presence fusion policy: {policy}")
+        self.policy = policy
+        # Results older than this are ignored, e.g. from a camera that stopped delivering
+        self.max_age = max_age if max_age is not None else max(2.0, 3 * camera_count * DETECTION_INTERVAL)
+        self.results = [None] * camera_count  # (detected or None if unknown, time.monotonic())
+        self.lock = threading.Lock()
+    
+    def update(self, index, detected):
+        """Record a camera's detection result (None = unknown) and return the fused presence"""
+        with self.lock:
+            self.results[index] = (None if detected is None else bool(detected), time.monotonic())
+        return self.fused()
+    
+    def fused(self):
+        """Fused presence over the cameras with a recent result; None if all of them are unknown"""
+        now = time.monotonic()
+        with self.lock:
+            recent = [result[0] for result in self.results
+                      if result is not None and now - result[1] <= self.max_age]
+        
+        # Unknown results (unusable frames) don't vote
+        votes = [detected for detected in recent if detected is not None]
+        if not votes:
+            return None if recent else False
+        if self.policy == FUSION_ANY:
+            return any(votes)
+        if self.policy == FUSION_ALL:
+            return all(votes)
+        return sum(votes) * 2 > len(votes)
+
+
+class MultiCameraManager:
+    """Runs N cameras, each with its own capture thread and frame ring.
+    
+    Frame access (get_frame, wait_for_frame, ...) goes to the primary camera,
+    so the GUI preview works unchanged. Detection visits the cameras in a
+    weighted round-robin, one frame per detection slot, so the total
+    detection rate stays at 1 / DETECTION_INTERVAL however many cameras are
+    attached; each camera gets its weight's share of that budget.
+    """
+    
+    def __init__(self, sources=None, policy=PRESENCE_FUSION, weights=CAMERA_DETECTION_WEIGHTS):
+        if sources is None:
+            sources = create_camera_sources()
+        self.cameras = [CameraManager(source=source) for source in sources]
+        self.primary = self.cameras[0]
+        self.fusion = PresenceFusion(len(self.cameras), policy)
+        
+        # Detection schedule: camera i appears weights[i] times per round
+        weights = weights or [1] * len(self.cameras)
+        self.schedule = [index for index, weight in enumerate(weights[:len(self.cameras)])
+                         for _ in range(max(0, int(weight)))] or list(range(len(self.cameras)))
+        self.schedule_position = 0
+        self.last_sequences = [0] * len(self.cameras)
+    
+    def start_camera(self):
+        """Start all cameras; succeeds if at least one camera started"""
+        started = [camera.start_camera() for camera in self.cameras]
+        return any(started)
+    
+    def stop_camera(self):
+        for camera in self.cameras:
+            camera.stop_camera()
+    
+    def restart_camera(self):
+        self.stop_camera()
+        return self.start_camera()
+    
+    def idle(self):
+        for camera in self.cameras:
+            if camera.is_running:
+                camera.idle()
+    
+    def resume(self):
+        """Resume every running camera without blocking; True if any could resume"""
+        resumed = [camera.resume() for camera in self.cameras]
+        return any(resumed)
+    
+    @property
+    def is_running(self):
+        return any(camera.is_running for camera in self.cameras)
+    
+    def is_camera_available(self):
+        return any(camera.is_camera_available() for camera in self.cameras)
+    
+    # Primary camera frame access (preview)
+    def get_frame(self):
+        return self.primary.get_frame()
+    
+    def get_frame_with_sequence(self):
+        return self.primary.get_frame_with_sequence()
+    
+    def get_frame_sequence(self):
+        return self.primary.get_frame_sequence()
+    
+    def wait_for_frame(self, after_sequence=0, timeout=None):
+        return self.primary.wait_for_frame(after_sequence, timeout)
+    
+    def get_frame_products(self, frame, sequence):
+        return self.primary.get_frame_products(frame, sequence)
+    
+    def get_capture_mode(self):
+        return self.primary.get_capture_mode()
+    
+    def get_health(self):
+        """Primary camera health, with per-camera health under 'cameras'"""
+        health = dict(self.primary.get_health())
+        health['cameras'] = [camera.get_health() for camera in self.cameras]
+        return health
+    
+    def wait_for_detection_frame(self, timeout=None):
+        """Next frame to run detection on, following the weighted round-robin.
+        
+        Returns (index, frame, sequence), or (None, None, 0) if the scheduled
+        camera has no new frame within `timeout`. The schedule advances
+        either way, so a dead camera never starves the others.
+        """
+        index = self.schedule[self.schedule_position]
+        self.schedule_position = (self.schedule_position + 1) % len(self.schedule)
+        
+        camera = self.cameras[index]
+        if not camera.is_running:
+            return None, None, 0
+        
+        frame, sequence = camera.wait_for_frame(self.last_sequences[index], timeout)
+        if frame is None:
+            return None, None, 0
+        
+        self.last_sequences[index] = sequence
+        return index, frame, sequence
+    
+    def get_camera_timestamp(self, index, sequence):
+        return self.cameras[index].get_frame_timestamp(sequence)
+    
+    def is_camera_frame_valid(self, index, sequence):
+        return self.cameras[index].is_frame_valid(sequence)
+    
+    def get_camera_products(self, index, frame, sequence):
+        return self.cameras[index].get_frame_products(frame, sequence)
+    
+    def report_detection(self, index, detected):
+        """Record camera `index`'s detection result (None = unknown) and return the fused presence"""
+        return self.fusion.update(index, detected)
+
+
+def create_camera_sources():
+    """Frame sources from config: one per CAMERA_DEVICE_INDICES entry, else the configured single source"""
+    if CAMERA_DEVICE_INDICES:
+        return [DeviceSource(indices=(index,)) for index in CAMERA_DEVICE_INDICES]
+    return [create_frame_source()]
@@ -0,0 +1,99 @@
+# presence_filter.py
+import time
+from collections import deque
+from config import (PRESENCE_FILTER_MODE, PRESENCE_ON_COUNT, PRESENCE_OFF_COUNT, PRESENCE_WINDOW,
+                    PRESENCE_UNKNOWN_TIMEOUT)
+
+# Filter modes
+FILTER_NONE = 'none'              # pass raw detections through
+FILTER_HYSTERESIS = 'hysteresis'  # flip after on_count / off_count consecutive opposite results
+FILTER_VOTE = 'vote'              # k-of-n vote over a sliding window, with separate on and off thresholds
+
+class PresenceFilter:
+    """Debounces raw per-detection presence into a stable present/absent state.
+
+    hysteresis: becomes present after `on_count` detections in a row with a
+    face, absent after `off_count` in a row without one.
+    vote: over the last `window` detections, becomes present once at least
+    `on_count` saw a face and absent once at least `off_count` did not.
+    
+    An unknown result (None, the frame couldn't show a face) keeps the
+    current state; once results have been unknown for `unknown_timeout`
+    seconds they are fed to the filter as "no face".
+    """
+
+    def __init__(self, mode=PRESENCE_FILTER_MODE, on_count=PRESENCE_ON_COUNT,
+                 off_count=PRESENCE_OFF_COUNT, window=PRESENCE_WINDOW,
+                 unknown_timeout=PRESENCE_UNKNOWN_TIMEOUT):
+        if mode not in (FILTER_NONE, FILTER_HYSTERESIS, FILTER_VOTE):
+            raise ValueError(f"Unknown presence filter mode: {mode}")
+        self.mode = mode
+        self.on_count = max(1, on_count)
+        self.off_count = max(1, off_count)
+        self.history = deque(maxlen=max(window, self.on_count, self.off_count))
+        self.present = False
+        self.last_raw = False
+        self.streak = 0  # consecutive raw results disagreeing with `present`
+        self.unknown_timeout = unknown_timeout
+        self.unknown_since = None  # time.monotonic() of the first unknown result in a row
+        self.unknown_results = 0
+        self.raw_transitions = 0
+        self.filtered_transitions = 0
+
+    def update(self, detected):
+        """Feed one raw detection result (None = unknown); returns the filtered presence"""
+        if detected is None:
+            self.unknown_results += 1
+            now = time.monotonic()
+            if self.unknown_since is None:
+                self.unknown_since = now
+            if now - self.unknown_since < self.unknown_timeout:
+                return self.present
+            # Unusable frames for too long - most likely nobody is there
+        else:
+            self.unknown_since = None
+        detected = bool(detected)
+        if detected != self.last_raw:
+            self.raw_transitions += 1
+            self.last_raw = detected
+        self.history.append(detected)
+
+        if self.mode == FILTER_NONE:
+            present = detected
+        elif self.mode == FILTER_HYSTERESIS:
+            self.streak = self.streak + 1 if detected != self.present else 0
+            needed = self.off_count if self.present else self.on_count
+            present = (not self.present) if self.streak >= needed else self.present
+        else:
+            positives = sum(self.history)
+            if self.present:
+                present = (len(self.history) - positives) < self.off_count
+            else:
+                present = positives >= self.on_count
+
+        if present != self.present:
+            self.present = present
+            self.streak = 0
+            self.filtered_transitions += 1
+        return self.present
+
+    def reset(self, present=False):
+        """Start over with fresh counters, e.g. when monitoring restarts"""
+        self.history.clear()
+        self.present = present
+        self.last_raw = present
+        self.streak = 0
+        self.unknown_since = None
+        self.unknown_results = 0
+        self.raw_transitions = 0
+        self.filtered_transitions = 0
+
+    def get_stats(self):
+        return {
+            'mode': self.mode,
+            'present': self.present,
+            'raw_transitions': self.raw_transitions,
+            'filtered_transitions': self.filtered_transitions,
+            'suppressed_transitions': max(0, self.raw_transitions - self.filtered_transitions),
+            'unknown_results': self.unknown_results
+        }
@@ -0,0 +1,89 @@
+# scheduler.py
+import heapq
+import itertools
+import threading
+import time
+
+class ScheduledCall:
+    """Handle for a scheduled callback; cancel() keeps it from running"""
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline  # time.monotonic() value
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """One thread that runs callbacks at time.monotonic() deadlines.
+
+    Pending calls wait in a heap ordered by deadline. The thread sleeps until
+    the earliest one is due and wakes early when an earlier call is added, so
+    nothing is re-armed every tick and no thread is created per call.
+    Callbacks run on the scheduler thread and should return quickly.
+    """
+
+    def __init__(self, name='scheduler'):
+        self.name = name
+        self.queue = []  # (deadline, order, ScheduledCall)
+        self.order = itertools.count()  # keeps calls with equal deadlines in scheduling order
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop the thread and drop all pending calls"""
+        with self.condition:
+            self.running = False
+            self.queue.clear()
+            self.condition.notify()
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+
+    def call_at(self, deadline, callback, *args):
+        """Run `callback(*args)` once time.monotonic() reaches `deadline`"""
+        call = ScheduledCall(deadline, callback, args)
+        with self.condition:
+            heapq.heappush(self.queue, (deadline, next(self.order), call))
+            if self.queue[0][2] is call:
+                # New earliest deadline - wake the thread to sleep for the shorter time
+                self.condition.notify()
+        return call
+
+    def call_later(self, delay, callback, *args):
+        """Run `callback(*args)` in `delay` seconds"""
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                call = None
+                while self.running:
+                    if self.queue and self.queue[0][2].cancelled:
+                        heapq.heappop(self.queue)
+                        continue
+                    now = time.monotonic()
+                    if self.queue and self.queue[0][0] <= now:
+                        call = heapq.heappop(self.queue)[2]
+                        break
+                    self.condition.wait(self.queue[0][0] - now if self.queue else None)
+                if call is None:
+                    return
+
+            try:
+                call.callback(*call.args)
+            except Exception as e:
+                print(f"Error in scheduled call: {e}")
@@ -0,0 +1,203 @@
+# session_recorder.py
+import cv2
+import datetime
+import json
+import numpy as np
+import os
+import queue
+import threading
+import zipfile
+from config import RECORDINGS_DIR, RECORDER_FRAME_STRIDE, RECORDER_QUEUE_SIZE, RECORDER_JPEG_QUALITY
+
+class SessionRecorder:
+    """Writes selected frames with their capture time and detection result to a zip archive.
+    
+    record() only copies the frame into a bounded queue; JPEG encoding and
+    archive writes happen on a background thread. When the queue is full
+    the frame is dropped instead of stalling the caller.
+    
+    Archive layout: frames/cam<camera>_<sequence>.jpg plus index.jsonl with one entry
+    per frame (file, camera, sequence, timestamp, faces, present). faces is
+    what the live detector found; present is the ground truth label, None
+    until set with label_session().
+    """
+    
+    def __init__(self, directory=RECORDINGS_DIR, stride=RECORDER_FRAME_STRIDE,
+                 queue_size=RECORDER_QUEUE_SIZE, jpeg_quality=RECORDER_JPEG_QUALITY):
+        self.directory = directory
+        self.stride = max(1, stride)
+        self.jpeg_quality = jpeg_quality
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.archive = None
+        self.archive_path = None
+        self.index = []
+        self.writer_thread = None
+        self.is_recording = False
+        self.offered = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.stale = 0  # frames overwritten in the camera ring before they could be copied
+    
+    def start(self, name=None):
+        """Open a new archive and start the writer thread"""
+        if self.is_recording:
+            return self.archive_path
+        
+        os.makedirs(self.directory, exist_ok=True)
+        name = name or datetime.datetime.now().strftime('session_%Y%m%d_%H%M%S')
+        self.archive_path = os.path.join(self.directory, f"{name}.zip")
+        # JPEG data is already compressed - store it, deflate only the index
+        self.archive = zipfile.ZipFile(self.archive_path, 'w', compression=zipfile.ZIP_STORED)
+        self.index = []
+        self.offered = self.recorded = self.dropped = self.stale = 0
+        
+        self.is_recording = True
+        self.writer_thread = threading.Thread(target=self._writer_loop)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+        print(f"Recording session to {self.archive_path}")
+        return self.archive_path
+    
+    def record(self, frame, sequence, timestamp, faces, camera_index=0, is_valid=None):
+        """Queue a frame for archiving; returns False if skipped or dropped
+        
+        `is_valid` is checked after the frame is copied, e.g. the camera's
+        is_frame_valid(sequence): a ring slot overwritten meanwhile would pair
+        the faces with a different frame, so such frames are dropped.
+        """
+        if not self.is_recording or frame is None:
+            return False
+        
+        self.offered += 1
+        if (self.offered - 1) % self.stride:
+            return False
+        
+        if self.queue.full():
+            self.dropped += 1
+            return False
+        
+        # Copy - the camera ring slot will be overwritten long before encoding
+        copy = frame.copy()
+        if timestamp is None or (is_valid is not None and not is_valid()):
+            self.stale += 1
+            return False
+        entry = (copy, sequence, timestamp, [list(map(int, box)) for box in faces], camera_index)
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+    
+    def _writer_loop(self):
+        """Encode queued frames and append them to the archive"""
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                break
+            
+            frame, sequence, timestamp, faces, camera_index = entry
+            try:
+                ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                if not ok:
+                    raise Exception("JPEG encoding failed")
+                
+                file_name = f"frames/cam{camera_index}_{sequence:08d}.jpg"
+                self.archive.writestr(file_name, encoded.tobytes())
+                self.index.append({
+                    'file': file_name,
+                    'camera': camera_index,
+                    'sequence': sequence,
+                    'timestamp': timestamp,
+                    'faces': faces,
+                    'present': None  # unlabeled - the detector's faces are not ground truth
+                })
+                self.recorded += 1
+            except Exception as e:
+                print(f"Error recording frame {sequence}: {e}")
+    
+    def stop(self):
+        """Flush queued frames, write the index and close the archive"""
+        if not self.is_recording:
+            return None
+        
+        self.is_recording = False
+        self.queue.put(None)
+        if self.writer_thread:
+            self.writer_thread.join()
+        
+        try:
+            index = '\n'.join(json.dumps(entry) for entry in self.index)
+            self.archive.writestr('index.jsonl', index, compress_type=zipfile.ZIP_DEFLATED)
+        finally:
+            self.archive.close()
+            self.archive = None
+        
+        print(f"Recording saved: {self.recorded} frames, {self.dropped} dropped, {self.stale} stale -> {self.archive_path}")
+        return self.archive_path
+    
+    def get_stats(self):
+        return {
+            'recording': self.is_recording,
+            'recorded': self.recorded,
+            'dropped': self.dropped,
+            'stale': self.stale,
+            'queued': self.queue.qsize(),
+            'archive': self.archive_path
+        }
+
+
+def read_session(archive_path):
+    """Iterate (entry, frame) pairs of a recorded session archive in recording order"""
+    with zipfile.ZipFile(archive_path) as archive:
+        lines = archive.read('index.jsonl').decode('utf-8').splitlines()
+        for line in lines:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            data = np.frombuffer(archive.read(entry['file']), dtype=np.uint8)
+            yield entry, cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def label_session(archive_path, present, first=None, last=None, camera=None):
+    """Set the ground truth label of recorded frames (entries' 'present'), e.g. for benchmark_detector.
+    
+    Labels the entries whose sequence lies in [first, last] (None = open
+    end), of one camera or all; present=None clears the label. The archive
+    is rewritten in place. Returns the number of entries labeled.
+    """
+    temp_path = archive_path + '.tmp'
+    with zipfile.ZipFile(archive_path) as archive:
+        lines = archive.read('index.jsonl').decode('utf-8').splitlines()
+        entries = [json.loads(line) for line in lines if line.strip()]
+        labeled = 0
+        for entry in entries:
+            if ((first is None or entry['sequence'] >= first) and (last is None or entry['sequence'] <= last)
+                    and (camera is None or entry['camera'] == camera)):
+                entry['present'] = present
+                labeled += 1
+        
+        # Zip members can't be replaced - copy the frames into a new archive with the new index
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_STORED) as output:
+            for item in archive.infolist():
+                if item.filename != 'index.jsonl':
+                    output.writestr(item, archive.read(item.filename))
+            index = '\n'.join(json.dumps(entry) for entry in entries)
+            output.writestr('index.jsonl', index, compress_type=zipfile.ZIP_DEFLATED)
+    os.replace(temp_path, archive_path)
+    return labeled
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Label the frames of a recorded session")
+    parser.add_argument('archive')
+    parser.add_argument('label', choices=['present', 'absent', 'clear'])
+    parser.add_argument('range', nargs='?', default='', help="FIRST-LAST frame sequence numbers (default: all)")
+    parser.add_argument('--camera', type=int, help="only this camera's frames")
+    args = parser.parse_args()
+    
+    first, _, last = args.range.partition('-')
+    count = label_session(args.archive, {'present': True, 'absent': False, 'clear': None}[args.label],
+                          int(first) if first else None, int(last) if last else None, args.camera)
+    print(f"Labeled {count} frames {args.label} in {args.archive}")
@@ -1,67 +1,124 @@
 # state_manager.py
 import datetime
 import threading
+import time
 from logger_db import DatabaseLogger
+from presence_filter import PresenceFilter, FILTER_HYSTERESIS
+from scheduler import Scheduler
+from config import EYE_OFF_COUNT, SCREEN_TIME_LIMIT, BREAK_TIME_REQUIRED
+
+# Seconds between minute data log entries
+MINUTE_LOG_INTERVAL = 60.0
 
 class StateManager:
+    """Screen and break time from face presence, with the popup and break-complete callbacks.
+    
+    Time is accounted from time.monotonic() deltas: a running screen or break
+    stretch remembers when it started and adds its length when it stops.
+    The screen-time limit, break completion and minute logging are deadlines
+    on one Scheduler thread, so they fire at their exact time; the callbacks
+    run on that thread.
+    """
+        
     def __init__(self):
         self.logger = DatabaseLogger()
         
         # State variables
         self.face_detected = False
-        self.screen_time = 0  # in seconds
-        self.break_time = 0   # in seconds
+        self.screen_seconds = 0.0  # finished screen time stretches, in seconds
+        self.break_seconds = 0.0   # finished break time stretches, in seconds
+        self.screen_started = None  # time.monotonic() when the running screen stretch began
+        self.break_started = None   # time.monotonic() when the running break stretch began
         self.popup_active = False
         self.current_session_start = None
         self.last_detection_time = None
         self.monitoring_active = False  # Control monitoring state
         
-        # Timers
-        self.screen_timer = None
-        self.break_timer = None
+        # Debounces raw detections so a single missed frame doesn't flip the state
+        self.presence_filter = PresenceFilter()
+        
+        # Eye checks (when enabled): face present but eyes not found = looking away
+        self.eye_filter = PresenceFilter(FILTER_HYSTERESIS, on_count=1, off_count=EYE_OFF_COUNT)
+        self.eye_filter.reset(present=True)
+        self.looking_away = False
+        
+        # Detection updates and scheduled deadlines come from different threads
+        self.lock = threading.RLock()
+        
+        # Deadlines (ScheduledCall handles)
+        self.scheduler = Scheduler('state-scheduler')
+        self.screen_timer = None  # screen time limit
+        self.break_timer = None   # break completion
         self.minute_logger_timer = None
+        self.next_minute_log = None
         
         # Callbacks
         self.on_popup_callback = None
         self.on_break_complete_callback = None
         
-        # Debug counter
-        self.debug_counter = 0
-        
     def start_monitoring(self):
         """Start monitoring - called when entering user/dev mode"""
-        if not self.monitoring_active:
-            self.monitoring_active = True
-            self._reset_counters()  # Reset counters when starting fresh
-            self._start_minute_logger()
-            self.logger.log_activity("MONITORING_START", "Monitoring dimulai")
-            print(" Monitoring started - counters reset")
-            
+        with self.lock:
+            if not self.monitoring_active:
+                self.monitoring_active = True
+                self._reset_counters()  # Reset counters when starting fresh
+                self.scheduler.start()
+                self._start_minute_logger()
+                self.logger.log_activity("MONITORING_START", "Monitoring dimulai")
+                print(" Monitoring started - counters reset")
+        
     def stop_monitoring(self):
         """Stop monitoring - called when exiting user/dev mode"""
-        if self.monitoring_active:
-            self.monitoring_active = False
-            self._stop_all_timers()
-            self.logger.log_activity("MONITORING_STOP", "Monitoring dihentikan")
-            print(" Monitoring stopped")
+        with self.lock:
+            if self.monitoring_active:
+                self.monitoring_active = False
+                self._stop_all_timers()
+                self.logger.log_activity("MONITORING_STOP", "Monitoring dihentikan")
+                print(" Monitoring stopped")
         
     def _reset_counters(self):
         """Reset all counters to initial state"""
-        self.screen_time = 0
-        self.break_time = 0
+        self._stop_all_timers()
+        self.screen_seconds = 0.0
+        self.break_seconds = 0.0
         self.popup_active = False
         self.face_detected = False
         self.current_session_start = None
+        self.presence_filter.reset()
+        self.eye_filter.reset(present=True)
+        self.looking_away = False
         print("Counters reset to zero")
         
+    def get_screen_time(self):
+        """Screen time in seconds, including the running stretch"""
+        with self.lock:
+            if self.screen_started is None:
+                return self.screen_seconds
+            return self.screen_seconds + time.monotonic() - self.screen_started
+        
+    def get_break_time(self):
+        """Break time in seconds, including the running stretch"""
+        with self.lock:
+            if self.break_started is None:
+                return self.break_seconds
+            return self.break_seconds + time.monotonic() - self.break_started
+        
     def _start_minute_logger(self):
-        """Start timer to log data every minute"""
-        if self.monitoring_active:
+        """Log data now and then every MINUTE_LOG_INTERVAL seconds"""
+        self.next_minute_log = time.monotonic()
+        self._log_minute()
+        
+    def _log_minute(self):
+        """Scheduled minute log"""
+        with self.lock:
+            if not self.monitoring_active:
+                return
             self._log_minute_data()
-            self.minute_logger_timer = threading.Timer(60.0, self._start_minute_logger)
-            self.minute_logger_timer.daemon = True
-            self.minute_logger_timer.start()
             
+            # Next slot counts from this slot's deadline, so slow logging doesn't make the cadence drift
+            self.next_minute_log = max(self.next_minute_log + MINUTE_LOG_INTERVAL, time.monotonic())
+            self.minute_logger_timer = self.scheduler.call_at(self.next_minute_log, self._log_minute)
+        
     def _log_minute_data(self):
         """Log data for the current minute"""
         try:
@@ -69,260 +126,268 @@ class StateManager:
                 self.logger.log_minute_data(
                     datetime.datetime.now(),
                     self.face_detected,
-                    self.screen_time,
-                    self.break_time
+                    int(self.get_screen_time()),
+                    int(self.get_break_time())
                 )
         except Exception as e:
             print(f"Error logging minute data: {e}")
+        
+    def update_face_detection(self, detected, eyes=None):
+        """Update face detection state from a raw detection (None = unknown) - only if monitoring is active
+        
+        `eyes` is the optional eye check (None = not checked). While the face
+        stays present but the eyes aren't seen, the user is looking away and
+        face_detected is False, so the look-away counts as break time.
+        """
+        with self.lock:
+            if not self.monitoring_active:
+                return False
             
-    def update_face_detection(self, detected):
-        """Update face detection state - only if monitoring is active"""
-        if not self.monitoring_active:
-            return False
-            
-        # Only update if detection status actually changes
-        if detected != self.face_detected:
-            old_state = self.face_detected
-            self.face_detected = detected
-            self.last_detection_time = datetime.datetime.now()
-            
-            if detected:
-                # Face detected - start screen time, stop break time
-                # Hanya mulai screen time jika belum mencapai batas 20 detik dan popup tidak aktif
-                if self.screen_time < 20 and not self.popup_active:
-                    self._start_screen_time()
-                self._stop_break_time()
-                self.break_time = 0  # Reset break time when face detected
-                self.logger.log_activity("FACE_DETECTED", "Wajah terdeteksi")
-                print("Face detected" + ("" if self.screen_time < 20 else " - Screen time already at limit, timer stopped"))
-            else:
-                # Face not detected - stop screen time, start break time
-                self._stop_screen_time()
-                # Hanya mulai break time jika popup aktif (sudah mencapai 20 detik)
-                if self.popup_active:
-                    self._start_break_time()
-                self.logger.log_activity("FACE_NOT_DETECTED", "Wajah tidak terdeteksi")
-                print("Face not detected" + (" - Starting break timer" if self.popup_active else " - No break needed"))
+            face_present = self.presence_filter.update(detected)
+            if not face_present:
+                self.eye_filter.reset(present=True)
+            elif eyes is not None:
+                self.eye_filter.update(eyes)
+            self.looking_away = face_present and not self.eye_filter.present
+            detected = face_present and not self.looking_away
             
-            return True
-        return False
+            # Only update if detection status actually changes
+            if detected != self.face_detected:
+                self.face_detected = detected
+                self.last_detection_time = datetime.datetime.now()
                 
+                if detected:
+                    # Face detected - start screen time, stop break time
+                    # Hanya mulai screen time jika belum mencapai batas dan popup tidak aktif
+                    below_limit = self.get_screen_time() < SCREEN_TIME_LIMIT
+                    if below_limit and not self.popup_active:
+                        self._start_screen_time()
+                    self._stop_break_time()
+                    self.break_seconds = 0.0  # Reset break time when face detected
+                    self.logger.log_activity("FACE_DETECTED", "Wajah terdeteksi")
+                    print("Face detected" + ("" if below_limit else " - Screen time already at limit, timer stopped"))
+                else:
+                    # Face not detected - stop screen time, start break time
+                    self._stop_screen_time()
+                    # Hanya mulai break time jika popup aktif (sudah mencapai batas screen time)
+                    if self.popup_active:
+                        self._start_break_time()
+                    if self.looking_away:
+                        self.logger.log_activity("LOOKING_AWAY", "Pengguna tidak melihat layar")
+                    else:
+                        self.logger.log_activity("FACE_NOT_DETECTED", "Wajah tidak terdeteksi")
+                    print(("Looking away" if self.looking_away else "Face not detected") +
+                          (" - Starting break timer" if self.popup_active else " - No break needed"))
+                
+                return True
+            return False
+        
     def _start_screen_time(self):
         """Start or resume screen time counting"""
         if not self.monitoring_active or not self.face_detected:
             return
-            
-        # Jangan mulai jika sudah mencapai batas 20 detik atau popup aktif
-        if self.screen_time >= 20 or self.popup_active:
+        
+        # Jangan mulai jika sudah mencapai batas atau popup aktif
+        if self.get_screen_time() >= SCREEN_TIME_LIMIT or self.popup_active:
             self._stop_screen_time()
             return
-            
+        
         # Cancel existing timer if any
         self._stop_screen_time()
-            
+        
         print("Starting screen timer...")
-        self.screen_timer = threading.Timer(1.0, self._increment_screen_time)
-        self.screen_timer.daemon = True
-        self.screen_timer.start()
+        self.screen_started = time.monotonic()
+        # Fires exactly when the remaining screen time is used up
+        deadline = self.screen_started + SCREEN_TIME_LIMIT - self.screen_seconds
+        self.screen_timer = self.scheduler.call_at(deadline, self._on_screen_limit)
         
         if self.current_session_start is None:
             self.current_session_start = datetime.datetime.now()
             self.logger.log_activity("SESSION_START", "Sesi penggunaan dimulai")
             print("New session started")
-            
+        
     def _stop_screen_time(self):
-        """Stop screen time counting"""
-        if self.screen_timer and self.screen_timer.is_alive():
+        """Stop screen time counting, adding the running stretch"""
+        if self.screen_timer:
             self.screen_timer.cancel()
             self.screen_timer = None
+        if self.screen_started is not None:
+            self.screen_seconds += time.monotonic() - self.screen_started
+            self.screen_started = None
             print("Screen timer stopped")
+        
+    def _on_screen_limit(self):
+        """Scheduled at the moment screen time reaches the limit"""
+        with self.lock:
+            # Hanya lanjut jika monitoring aktif, wajah terdeteksi, dan screen time masih berjalan
+            if not self.monitoring_active or not self.face_detected or self.screen_started is None:
+                return
+            if self.get_screen_time() < SCREEN_TIME_LIMIT - 1e-3:
+                return  # a stale deadline from an earlier stretch
             
-    def _increment_screen_time(self):
-        """Increment screen time and check for limits"""
-        # Hanya lanjut jika monitoring aktif, wajah terdeteksi, dan belum mencapai batas
-        if self.monitoring_active and self.face_detected and self.screen_time < 20:
-            self.screen_time += 1
-            self.debug_counter += 1
-            
-            # Debug log every 5 seconds
-            if self.debug_counter % 5 == 0:
-                print(f"Screen time: {self.screen_time}s (Popup: {self.popup_active})")
-            
-            # Check if screen time limit reached
-            if self.screen_time >= 20:
-                print(f"Screen time limit reached: {self.screen_time}s - Stopping timer and showing popup")
-                self._stop_screen_time()  # Hentikan timer screen time
-                self._show_popup_warning()
-                
-            # Continue timer only jika masih dalam kondisi yang diperbolehkan
-            elif self.monitoring_active and self.face_detected and self.screen_time < 20:
-                self.screen_timer = threading.Timer(1.0, self._increment_screen_time)
-                self.screen_timer.daemon = True
-                self.screen_timer.start()
-            else:
-                self._stop_screen_time()
-        else:
             self._stop_screen_time()
-            
+            self.screen_seconds = float(SCREEN_TIME_LIMIT)
+            print(f"Screen time limit reached: {SCREEN_TIME_LIMIT}s - Stopping timer and showing popup")
+            if not self._show_popup_warning():
+                return
+        
+        # Outside the lock - the UI may call back into the state manager
+        self._run_callback(self.on_popup_callback, "popup")
+        
     def _show_popup_warning(self):
-        """Show popup warning for excessive screen time"""
+        """Mark the popup for excessive screen time as shown; True if it wasn't already"""
         if self.monitoring_active and not self.popup_active:
             self.popup_active = True
-            self.logger.log_activity("POPUP_SHOWN", "Peringatan: Penggunaan layar melebihi 20 detik")
+            self.logger.log_activity("POPUP_SHOWN",
+                                     f"Peringatan: Penggunaan layar melebihi {SCREEN_TIME_LIMIT} detik")
             print("Popup warning triggered - waiting for break...")
             
             # Hentikan screen time ketika popup aktif
             self._stop_screen_time()
-            
-            # Panggil callback dengan error handling
-            if self.on_popup_callback:
-                try:
-                    self.on_popup_callback()
-                    print("Popup callback executed successfully")
-                except Exception as e:
-                    print(f"Error in popup callback: {e}")
-            else:
-                print("No popup callback registered!")
-            
+            return True
+        return False
+        
+    def _run_callback(self, callback, name):
+        """Call a UI callback with error handling"""
+        if callback:
+            try:
+                callback()
+                print(f"{name.capitalize()} callback executed successfully")
+            except Exception as e:
+                print(f"Error in {name} callback: {e}")
+        else:
+            print(f"No {name} callback registered!")
+        
     def _start_break_time(self):
         """Start break time counting"""
         # Hanya mulai break time jika monitoring aktif, wajah tidak terdeteksi, DAN popup aktif
         if not self.monitoring_active or self.face_detected or not self.popup_active:
             return
-            
+        
         # Cancel existing timer if any
         self._stop_break_time()
-            
+        
         print("Starting break timer...")
-        self.break_timer = threading.Timer(1.0, self._increment_break_time)
-        self.break_timer.daemon = True
-        self.break_timer.start()
+        self.break_started = time.monotonic()
+        # Fires exactly when the required break time is reached
+        deadline = self.break_started + BREAK_TIME_REQUIRED - self.break_seconds
+        self.break_timer = self.scheduler.call_at(deadline, self._on_break_complete)
         
     def _stop_break_time(self):
-        """Stop break time counting"""
-        if self.break_timer and self.break_timer.is_alive():
+        """Stop break time counting, adding the running stretch"""
+        if self.break_timer:
             self.break_timer.cancel()
             self.break_timer = None
+        if self.break_started is not None:
+            self.break_seconds += time.monotonic() - self.break_started
+            self.break_started = None
             print("Break timer stopped")
+        
+    def _on_break_complete(self):
+        """Scheduled at the moment break time reaches the requirement"""
+        with self.lock:
+            # Hanya lanjut jika monitoring aktif, wajah tidak terdeteksi, popup aktif, dan break time berjalan
+            if (not self.monitoring_active or self.face_detected or
+                    not self.popup_active or self.break_started is None):
+                return
+            if self.get_break_time() < BREAK_TIME_REQUIRED - 1e-3:
+                return  # a stale deadline from an earlier stretch
             
-    def _increment_break_time(self):
-        """Increment break time and check for completion"""
-        # Hanya lanjut jika monitoring aktif, wajah tidak terdeteksi, popup aktif, dan belum mencapai 7 detik
-        if (self.monitoring_active and not self.face_detected and 
-            self.popup_active and self.break_time < 7):
-            self.break_time += 1
-            
-            # Debug log
-            if self.break_time % 3 == 0:
-                print(f"Break time: {self.break_time}s (Popup: {self.popup_active})")
-            
-            # Check if break time requirement met
-            if self.break_time >= 7:
-                print(f"Break completed: {self.break_time}s - Resetting counters")
-                self._complete_break()
-                
-            # Continue timer hanya jika masih dalam kondisi yang diperbolehkan
-            elif (self.monitoring_active and not self.face_detected and 
-                  self.popup_active and self.break_time < 7):
-                self.break_timer = threading.Timer(1.0, self._increment_break_time)
-                self.break_timer.daemon = True
-                self.break_timer.start()
-            else:
-                self._stop_break_time()
-        else:
-            self._stop_break_time()
-            
+            print(f"Break completed: {BREAK_TIME_REQUIRED}s - Resetting counters")
+            if not self._complete_break():
+                return
+        
+        self._run_callback(self.on_break_complete_callback, "break complete")
+        
     def _complete_break(self):
-        """Complete break and reset counters"""
-        if self.monitoring_active:
-            self.popup_active = False
-            self.screen_time = 0
-            self.break_time = 0
-            self.debug_counter = 0
-            
-            # Hentikan semua timer
-            self._stop_screen_time()
-            self._stop_break_time()
-            
-            # End current session
-            if self.current_session_start:
-                session_end = datetime.datetime.now()
-                duration = (session_end - self.current_session_start).seconds
-                self.logger.log_usage_session(
-                    self.current_session_start,
-                    session_end,
-                    duration,
-                    True,  # face was detected
-                    True,  # popup was shown
-                    True   # break was taken
-                )
-                self.current_session_start = None
-                
-            self.logger.log_activity("BREAK_COMPLETE", "Istirahat 7 detik selesai")
-            print(" Break completed - all counters reset and timers stopped")
-            
-            # Panggil callback dengan error handling
-            if self.on_break_complete_callback:
-                try:
-                    self.on_break_complete_callback()
-                    print("Break complete callback executed successfully")
-                except Exception as e:
-                    print(f" Error in break complete callback: {e}")
-            else:
-                print("No break complete callback registered!")
-            
+        """Complete break and reset counters; True if monitoring was active"""
+        if not self.monitoring_active:
+            return False
+        
+        # Hentikan screen dan break timer
+        self._stop_screen_time()
+        self._stop_break_time()
+        self.popup_active = False
+        self.screen_seconds = 0.0
+        self.break_seconds = 0.0
+        
+        # End current session
+        if self.current_session_start:
+            session_end = datetime.datetime.now()
+            duration = (session_end - self.current_session_start).seconds
+            self.logger.log_usage_session(
+                self.current_session_start,
+                session_end,
+                duration,
+                True,  # face was detected
+                True,  # popup was shown
+                True   # break was taken
+            )
+            self.current_session_start = None
+        
+        self.logger.log_activity("BREAK_COMPLETE", f"Istirahat {BREAK_TIME_REQUIRED} detik selesai")
+        print(" Break completed - all counters reset and timers stopped")
+        return True
+        
     def reset_counters(self):
         """Reset all counters manually"""
-        if self.monitoring_active:
-            self.screen_time = 0
-            self.break_time = 0
-            self.popup_active = False
-            self.debug_counter = 0
-            
-            # Hentikan semua timer
-            self._stop_screen_time()
-            self._stop_break_time()
-            
-            if self.current_session_start:
-                session_end = datetime.datetime.now()
-                duration = (session_end - self.current_session_start).seconds
-                self.logger.log_usage_session(
-                    self.current_session_start,
-                    session_end,
-                    duration,
-                    self.face_detected,
-                    self.popup_active,
-                    False  # break not taken
-                )
-                self.current_session_start = None
+        with self.lock:
+            if self.monitoring_active:
+                # Hentikan screen dan break timer
+                self._stop_screen_time()
+                self._stop_break_time()
+                self.screen_seconds = 0.0
+                self.break_seconds = 0.0
+                self.popup_active = False
+                
+                if self.current_session_start:
+                    session_end = datetime.datetime.now()
+                    duration = (session_end - self.current_session_start).seconds
+                    self.logger.log_usage_session(
+                        self.current_session_start,
+                        session_end,
+                        duration,
+                        self.face_detected,
+                        self.popup_active,
+                        False  # break not taken
+                    )
+                    self.current_session_start = None
                 
-            self.logger.log_activity("MANUAL_RESET", "Pengguna mereset counter secara manual")
-            print("Manual reset - counters cleared and timers stopped")
+                self.logger.log_activity("MANUAL_RESET", "Pengguna mereset counter secara manual")
+                print("Manual reset - counters cleared and timers stopped")
         
     def get_current_state(self):
-        """Get current state as dictionary"""
-        return {
-            'face_detected': self.face_detected,
-            'screen_time': self.screen_time,
-            'break_time': self.break_time,
-            'popup_active': self.popup_active,
-            'session_active': self.current_session_start is not None,
-            'monitoring_active': self.monitoring_active
-        }
+        """Get current state as dictionary (times in whole seconds)"""
+        with self.lock:
+            return {
+                'face_detected': self.face_detected,
+                'looking_away': self.looking_away,
+                'screen_time': int(self.get_screen_time()),
+                'break_time': int(self.get_break_time()),
+                'popup_active': self.popup_active,
+                'session_active': self.current_session_start is not None,
+                'monitoring_active': self.monitoring_active
+            }
+        
+    def get_presence_stats(self):
+        """Raw vs filtered presence transition counts"""
+        return self.presence_filter.get_stats()
         
     def _stop_all_timers(self):
         """Stop all active timers"""
         self._stop_screen_time()
         self._stop_break_time()
+        if self.minute_logger_timer:
+            self.minute_logger_timer.cancel()
+            self.minute_logger_timer = None
         
     def cleanup(self):
         """Clean up timers and resources"""
-        self.monitoring_active = False
-        self._stop_all_timers()
+        with self.lock:
+            self.monitoring_active = False
+            self._stop_all_timers()
+        self.scheduler.stop()
         
-        if self.minute_logger_timer and self.minute_logger_timer.is_alive():
-            self.minute_logger_timer.cancel()
-            
         # Log final session if active
         if self.current_session_start:
             session_end = datetime.datetime.now()
@@ -333,5 +398,5 @@ class StateManager:
                 duration,
                 self.face_detected,
                 self.popup_active,
-                self.break_time >= 7
-            )
\ No newline at end of file
+                self.break_seconds >= BREAK_TIME_REQUIRED
+            )
@@ -0,0 +1,78 @@
+# test_presence_filter.py
+import time
+import pytest
+from presence_filter import PresenceFilter, FILTER_NONE, FILTER_HYSTERESIS, FILTER_VOTE
+
+
+def feed(presence_filter, results):
+    return [presence_filter.update(detected) for detected in results]
+
+
+def test_hysteresis_needs_consecutive_results_to_flip():
+    presence_filter = PresenceFilter(FILTER_HYSTERESIS, on_count=2, off_count=3)
+
+    assert feed(presence_filter, [True, True]) == [False, True]
+    assert feed(presence_filter, [False, False, False]) == [True, True, False]
+
+
+def test_hysteresis_suppresses_single_glitches():
+    presence_filter = PresenceFilter(FILTER_HYSTERESIS, on_count=2, off_count=3)
+    feed(presence_filter, [True, True])
+
+    # Missed detections that don't reach off_count in a row never flip the state
+    assert feed(presence_filter, [False, True, False, False, True]) == [True] * 5
+    stats = presence_filter.get_stats()
+    assert stats['filtered_transitions'] == 1
+    assert stats['raw_transitions'] == 5
+    assert stats['suppressed_transitions'] == 4
+
+
+def test_vote_uses_the_sliding_window():
+    presence_filter = PresenceFilter(FILTER_VOTE, on_count=3, off_count=3, window=5)
+
+    # Present once 3 of the last 5 saw a face, not necessarily in a row
+    assert feed(presence_filter, [True, False, True, False, True]) == [False, False, False, False, True]
+    # Absent once 3 of the last 5 didn't: window is now F T F T F
+    assert feed(presence_filter, [False]) == [False]
+
+
+def test_none_mode_passes_results_through():
+    presence_filter = PresenceFilter(FILTER_NONE)
+
+    assert feed(presence_filter, [True, False, True]) == [True, False, True]
+
+
+def test_unknown_results_hold_the_state_until_the_timeout():
+    presence_filter = PresenceFilter(FILTER_HYSTERESIS, on_count=1, off_count=1, unknown_timeout=0.1)
+    feed(presence_filter, [True])
+
+    assert feed(presence_filter, [None, None]) == [True, True]
+    time.sleep(0.12)
+    # Unknown for too long - fed as "no face"
+    assert presence_filter.update(None) is False
+    assert presence_filter.get_stats()['unknown_results'] == 3
+
+
+def test_a_known_result_restarts_the_unknown_timeout():
+    presence_filter = PresenceFilter(FILTER_HYSTERESIS, on_count=1, off_count=1, unknown_timeout=0.1)
+    feed(presence_filter, [True, None])
+    time.sleep(0.06)
+    feed(presence_filter, [True, None])
+    time.sleep(0.06)
+
+    assert presence_filter.update(None) is True
+
+
+def test_reset_clears_state_and_counters():
+    presence_filter = PresenceFilter(FILTER_HYSTERESIS, on_count=1, off_count=1)
+    feed(presence_filter, [True, False, None])
+    presence_filter.reset()
+
+    assert presence_filter.present is False
+    stats = presence_filter.get_stats()
+    assert (stats['raw_transitions'], stats['filtered_transitions'], stats['unknown_results']) == (0, 0, 0)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        PresenceFilter('median')
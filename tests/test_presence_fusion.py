@@ -0,0 +1,53 @@
+# test_presence_fusion.py
+import time
+import pytest
+from multi_camera import PresenceFusion, FUSION_ANY, FUSION_MAJORITY, FUSION_ALL
+
+
+def fuse(policy, results, max_age=None):
+    fusion = PresenceFusion(len(results), policy, max_age)
+    for index, detected in enumerate(results):
+        fusion.update(index, detected)
+    return fusion.fused()
+
+
+def test_any_needs_one_camera():
+    assert fuse(FUSION_ANY, [False, True, False]) is True
+    assert fuse(FUSION_ANY, [False, False, False]) is False
+
+
+def test_majority_needs_more_than_half():
+    assert fuse(FUSION_MAJORITY, [True, True, False]) is True
+    assert fuse(FUSION_MAJORITY, [True, False]) is False
+
+
+def test_all_needs_every_camera():
+    assert fuse(FUSION_ALL, [True, True]) is True
+    assert fuse(FUSION_ALL, [True, False]) is False
+
+
+def test_unknown_cameras_do_not_vote():
+    assert fuse(FUSION_ALL, [True, None]) is True
+    assert fuse(FUSION_MAJORITY, [False, None, None]) is False
+
+
+def test_all_unknown_is_unknown():
+    assert fuse(FUSION_ANY, [None, None]) is None
+
+
+def test_no_results_is_absent():
+    assert PresenceFusion(2, FUSION_ANY).fused() is False
+
+
+def test_stale_results_are_ignored():
+    fusion = PresenceFusion(2, FUSION_ANY, max_age=0.05)
+    fusion.update(0, True)
+    time.sleep(0.08)
+
+    # Camera 0 stopped delivering - only camera 1's fresh result counts
+    assert fusion.update(1, False) is False
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        PresenceFusion(2, 'first')
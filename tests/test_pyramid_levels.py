@@ -0,0 +1,34 @@
+# test_pyramid_levels.py
+from detector import pyramid_levels
+
+
+class FakeCascade:
+    scale_factor = 2.0
+    window_size = (24, 24)
+
+
+class FakeNetwork:
+    window_size = (0, 0)
+
+
+def test_counts_window_sizes_that_fit_the_image():
+    # Windows of 24, 48 and 96 pixels fit a 100x100 image; 192 doesn't
+    assert pyramid_levels((100, 100), FakeCascade()) == 3
+
+
+def test_min_size_skips_the_small_levels():
+    assert pyramid_levels((100, 100), FakeCascade(), min_size=(40, 40)) == 2
+
+
+def test_max_size_skips_the_large_levels():
+    assert pyramid_levels((100, 100), FakeCascade(), max_size=(50, 50)) == 2
+
+
+def test_a_size_band_scans_fewer_levels_than_the_full_range():
+    full = pyramid_levels((480, 640), FakeCascade())
+    band = pyramid_levels((480, 640), FakeCascade(), min_size=(40, 40), max_size=(100, 100))
+    assert band < full
+
+
+def test_non_cascade_backends_count_as_one_pass():
+    assert pyramid_levels((480, 640), FakeNetwork()) == 1
@@ -0,0 +1,76 @@
+# test_scheduler.py
+import threading
+import time
+import pytest
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler('test-scheduler')
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+
+def test_call_fires_at_its_deadline(scheduler):
+    fired = threading.Event()
+    fired_at = []
+    deadline = time.monotonic() + 0.1
+    scheduler.call_at(deadline, lambda: (fired_at.append(time.monotonic()), fired.set()))
+
+    assert fired.wait(2.0)
+    assert deadline <= fired_at[0] < deadline + 0.2
+
+
+def test_calls_run_in_deadline_order(scheduler):
+    order = []
+    done = threading.Event()
+    scheduler.call_later(0.15, order.append, 'third')
+    scheduler.call_later(0.05, order.append, 'first')
+    scheduler.call_later(0.10, order.append, 'second')
+    scheduler.call_later(0.20, done.set)
+
+    assert done.wait(2.0)
+    assert order == ['first', 'second', 'third']
+
+
+def test_earlier_call_wakes_the_sleeping_thread(scheduler):
+    fired = threading.Event()
+    scheduler.call_later(10.0, lambda: None)
+    start = time.monotonic()
+    scheduler.call_later(0.05, fired.set)
+
+    assert fired.wait(2.0)
+    assert time.monotonic() - start < 1.0
+
+
+def test_cancelled_call_does_not_run(scheduler):
+    calls = []
+    done = threading.Event()
+    call = scheduler.call_later(0.05, calls.append, 'cancelled')
+    scheduler.call_later(0.15, done.set)
+    call.cancel()
+
+    assert done.wait(2.0)
+    assert calls == []
+
+
+def test_failing_callback_does_not_stop_the_scheduler(scheduler):
+    fired = threading.Event()
+    scheduler.call_later(0.01, lambda: 1 / 0)
+    scheduler.call_later(0.05, fired.set)
+
+    assert fired.wait(2.0)
+
+
+def test_stop_drops_pending_calls():
+    scheduler = Scheduler('test-scheduler')
+    scheduler.start()
+    calls = []
+    scheduler.call_later(0.1, calls.append, 'pending')
+    scheduler.stop()
+    time.sleep(0.2)
+
+    assert calls == []
+    assert scheduler.queue == []
@@ -0,0 +1,107 @@
+# test_state_manager.py
+import threading
+import time
+import pytest
+import logger_db
+import state_manager
+from state_manager import StateManager
+
+SCREEN_LIMIT = 0.3
+BREAK_REQUIRED = 0.3
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    # Short limits, and a throwaway database instead of data/eye_protection.db
+    monkeypatch.setattr(logger_db, 'DB_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setattr(state_manager, 'SCREEN_TIME_LIMIT', SCREEN_LIMIT)
+    monkeypatch.setattr(state_manager, 'BREAK_TIME_REQUIRED', BREAK_REQUIRED)
+    manager = StateManager()
+    manager.popup = threading.Event()
+    manager.break_complete = threading.Event()
+    manager.on_popup_callback = manager.popup.set
+    manager.on_break_complete_callback = manager.break_complete.set
+    yield manager
+    manager.cleanup()
+
+
+def feed(manager, detected, count=5):
+    """Enough identical raw results to get through the presence filter"""
+    for _ in range(count):
+        manager.update_face_detection(detected)
+
+
+def test_detections_are_ignored_until_monitoring_starts(manager):
+    assert manager.update_face_detection(True) is False
+    assert not manager.face_detected
+
+
+def test_popup_fires_when_screen_time_reaches_the_limit(manager):
+    manager.start_monitoring()
+    start = time.monotonic()
+    feed(manager, True)
+
+    assert manager.popup.wait(2.0)
+    assert time.monotonic() - start >= SCREEN_LIMIT
+    state = manager.get_current_state()
+    assert state['popup_active']
+    assert manager.get_screen_time() == pytest.approx(SCREEN_LIMIT)
+
+
+def test_screen_time_only_runs_while_present(manager, monkeypatch):
+    monkeypatch.setattr(state_manager, 'SCREEN_TIME_LIMIT', 10.0)
+    manager.start_monitoring()
+    feed(manager, True)
+    time.sleep(0.1)
+    feed(manager, False)
+    paused = manager.get_screen_time()
+    time.sleep(0.2)
+
+    assert manager.get_screen_time() == paused
+    assert 0.1 <= paused < 0.3
+    assert not manager.popup.is_set()
+
+
+def test_break_completes_after_required_absence(manager):
+    manager.start_monitoring()
+    feed(manager, True)
+    assert manager.popup.wait(2.0)
+
+    start = time.monotonic()
+    feed(manager, False)
+    assert manager.break_complete.wait(2.0)
+    assert time.monotonic() - start >= BREAK_REQUIRED
+    state = manager.get_current_state()
+    assert not state['popup_active']
+    assert manager.get_screen_time() == 0.0
+    assert manager.get_break_time() == 0.0
+
+
+def test_returning_early_cancels_the_break(manager):
+    manager.start_monitoring()
+    feed(manager, True)
+    assert manager.popup.wait(2.0)
+
+    feed(manager, False)
+    time.sleep(BREAK_REQUIRED / 3)
+    feed(manager, True)
+
+    assert not manager.break_complete.wait(BREAK_REQUIRED * 2)
+    assert manager.get_current_state()['popup_active']
+    assert manager.get_break_time() == 0.0
+
+
+def test_unknown_results_keep_the_user_present(manager):
+    manager.start_monitoring()
+    feed(manager, True)
+    feed(manager, None)
+
+    assert manager.face_detected
+
+
+def test_stop_monitoring_cancels_the_screen_deadline(manager):
+    manager.start_monitoring()
+    feed(manager, True)
+    manager.stop_monitoring()
+
+    assert not manager.popup.wait(SCREEN_LIMIT * 2)
@@ -0,0 +1,39 @@
+# test_tiling.py
+from detector import split_tiles, merge_boxes
+
+
+def test_single_tile_is_the_whole_image():
+    tiles, _ = split_tiles(640, 480, 1, 1)
+    assert tiles == [(0, 0, 640, 480)]
+
+
+def test_tiles_cover_the_image():
+    tiles, _ = split_tiles(1920, 1080, 2, 2)
+    assert len(tiles) == 4
+    assert min(x0 for x0, _, _, _ in tiles) == 0 and min(y0 for _, y0, _, _ in tiles) == 0
+    assert max(x1 for _, _, x1, _ in tiles) == 1920 and max(y1 for _, _, _, y1 in tiles) == 1080
+
+
+def test_faces_up_to_the_overlap_fit_inside_one_tile():
+    width, height = 1920, 1080
+    tiles, face = split_tiles(width, height, 3, 2)
+    assert face > 0
+    for x in range(0, width - face + 1, 37):
+        for y in range(0, height - face + 1, 37):
+            assert any(x0 <= x and y0 <= y and x + face <= x1 and y + face <= y1
+                       for x0, y0, x1, y1 in tiles), (x, y)
+
+
+def test_merge_drops_a_seam_cut_duplicate():
+    full = (100, 100, 80, 80)
+    partial = (100, 100, 50, 80)  # the same face cut by a tile edge
+    assert merge_boxes([partial, full]) == [full]
+
+
+def test_merge_keeps_separate_faces():
+    boxes = [(0, 0, 50, 50), (200, 0, 60, 60)]
+    assert sorted(merge_boxes(boxes)) == sorted(boxes)
+
+
+def test_merge_of_nothing_is_empty():
+    assert merge_boxes([]) == []